@@ -0,0 +1,48 @@
+""" Compares the cost of resolving client.resource.operation per call with
+    and without the client reusing its decorators.
+
+    $ PYTHONPATH=src python benchmarks/dispatch.py --calls 200000
+"""
+import os
+import tempfile
+import time
+
+import click
+
+from specd.sdk import create_sdk
+
+from yaml_loader import make_specd
+
+
+def dispatch_all(sdk, calls: int, rebuild: bool):
+    sdk.set_headers(Authorization="Token 0123456789ABCDEF")
+    start = time.perf_counter()
+    for _ in range(calls):
+        if rebuild:
+            sdk._decorators.clear()
+        sdk.items.get_item_0.update_headers({})
+    return (time.perf_counter() - start) / calls
+
+
+@click.command()
+@click.option("--calls", "-n", default=200000)
+@click.option("--files", default=10)
+def main(calls, files):
+    with tempfile.TemporaryDirectory() as root:
+        spec_dir = make_specd(os.path.join(root, "specd"), files)
+        meta = spec_dir.meta.read()
+        meta["info"]["version"] = "1.0"
+        spec_dir.meta.write(meta)
+        sdk = create_sdk(spec_dir.root)
+
+        # clearing the cache every call is how each access used to behave
+        before = dispatch_all(sdk, calls, rebuild=True)
+        after = dispatch_all(sdk, calls, rebuild=False)
+
+    click.echo(f"calls: {calls}")
+    click.echo(f"dispatch  rebuilt  {before * 1e9:8.0f} ns/call")
+    click.echo(f"dispatch  reused   {after * 1e9:8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
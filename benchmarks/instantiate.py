@@ -0,0 +1,51 @@
+""" Compares instantiate throughput with and without the model registry.
+
+    $ PYTHONPATH=src python benchmarks/instantiate.py --records 20000
+"""
+import os
+import tempfile
+import time
+
+import click
+
+from specd.sdk import create_sdk
+from specd.sdk.functions import get_model_types
+
+from yaml_loader import make_specd
+
+RECORD = {"id": 1, "name": "item", "tags": ["a", "b"]}
+
+
+def instantiate_all(sdk, records: int):
+    start = time.perf_counter()
+    for index in range(records):
+        sdk.instantiate("Item0", dict(RECORD, id=index))
+    return records / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option("--records", "-n", default=20000)
+@click.option("--files", default=100)
+def main(records, files):
+    with tempfile.TemporaryDirectory() as root:
+        spec_dir = make_specd(os.path.join(root, "specd"), files)
+        meta = spec_dir.meta.read()
+        meta["info"]["version"] = "1.0"
+        spec_dir.meta.write(meta)
+
+        # a registry that holds nothing rebuilds the type per record
+        before = create_sdk(spec_dir.root, model_cache_size=0)
+        before_rate = instantiate_all(before, records)
+        assert len(get_model_types(before.swagger_spec)) == 0
+
+        after = create_sdk(spec_dir.root)
+        after_rate = instantiate_all(after, records)
+        assert "Item0" in get_model_types(after.swagger_spec)
+
+    click.echo(f"records: {records}")
+    click.echo(f"instantiate  rebuilt {before_rate:10.0f}/s")
+    click.echo(f"instantiate  cached  {after_rate:10.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
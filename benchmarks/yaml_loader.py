@@ -0,0 +1,95 @@
+""" Compares libyaml and pure-Python YAML loading on a synthetic specd.
+
+    $ PYTHONPATH=src python benchmarks/yaml_loader.py --files 5000
+"""
+import copy
+import os
+import tempfile
+import time
+
+import click
+import yaml
+
+from specd import SpecDir, utils
+from specd.model import Definition, Operation, Path
+
+OPERATION = {
+    "operationId": "get_item",
+    "parameters": [
+        {"in": "path", "name": "itemId", "required": True, "type": "string"}
+    ],
+    "produces": ["application/json"],
+    "responses": {
+        "200": {"description": "OK", "schema": {"$ref": None}},
+        "404": {"description": "Not Found"},
+    },
+    "tags": ["items"],
+}
+
+DEFINITION = {
+    "properties": {
+        "id": {"format": "int64", "type": "integer"},
+        "name": {"type": "string"},
+        "tags": {"items": {"type": "string"}, "type": "array"},
+    },
+    "required": ["id", "name"],
+    "type": "object",
+}
+
+
+def make_specd(root: str, files: int) -> SpecDir:
+    spec_dir = SpecDir(root, "yaml")
+    spec_dir.meta.write({"swagger": "2.0", "info": {"title": "bench"}})
+
+    num_definitions = max(files // 5, 1)
+    for index in range(num_definitions):
+        Definition(spec_dir, f"Item{index}").write(DEFINITION)
+
+    for index in range(files - num_definitions):
+        path = Path(spec_dir, f"/items{index}/{{itemId}}")
+        spec = copy.deepcopy(OPERATION)
+        spec["operationId"] = f"get_item_{index}"
+        spec["responses"]["200"]["schema"]["$ref"] = (
+            f"#/definitions/Item{index % num_definitions}"
+        )
+        Operation(spec_dir, path, "get").write(spec)
+
+    return spec_dir
+
+
+def read_contents(root: str) -> list:
+    contents = []
+    for path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            with open(os.path.join(path, file_name)) as file_handle:
+                contents.append(file_handle.read())
+    return contents
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def load_all(contents, loader):
+    return [utils.load_yaml(content, loader=loader) for content in contents]
+
+
+@click.command()
+@click.option("--files", "-n", default=5000)
+def main(files):
+    with tempfile.TemporaryDirectory() as root:
+        make_specd(root, files)
+        contents = read_contents(root)
+
+        c_specs, c_load = timed(load_all, contents, utils.YamlLoader)
+        py_specs, py_load = timed(load_all, contents, yaml.SafeLoader)
+        assert c_specs == py_specs
+
+    click.echo(f"files: {len(contents)}, libyaml: {yaml.__with_libyaml__}")
+    click.echo(f"load  libyaml {c_load:8.3f}s  python {py_load:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
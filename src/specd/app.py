@@ -1,7 +1,12 @@
+import hashlib
+import json
 import os
-from flask import Flask, redirect, jsonify, abort, request
+import threading
+
+from flask import Flask, redirect, abort, request
 from flask_swagger_ui import get_swaggerui_blueprint
 from .model import SpecDir
+from .watch import Watcher
 
 
 def build_doc_url(host, targets):
@@ -11,7 +16,56 @@ def build_doc_url(host, targets):
     return f"/doc?{'&'.join(params)}" if params else "/doc"
 
 
-def add_swagger(app, host, name, target):
+class DocCache(object):
+    """ Pre-encoded /doc responses, cleared when the specd changes. """
+
+    def __init__(
+        self, root: str, interval: float = 1.0, use_cache: bool = False
+    ):
+        self.spec_dir = SpecDir(root, use_cache=use_cache)
+        self.responses = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.watcher = Watcher(self.spec_dir, interval)
+        self.watcher.subscribe(self.clear)
+
+    def clear(self, changed=None):
+        with self.lock:
+            self.responses = {}
+            self.generation += 1
+
+    def get(self, targets, host, schemes):
+        """ Returns (etag, body) of the spec for targets, host and schemes. """
+        self.watcher.start()
+        key = (tuple(sorted(set(targets))), host, schemes)
+        with self.lock:
+            response = self.responses.get(key)
+            generation = self.generation
+
+        if response is None:
+            response = self.build(targets, host, schemes)
+            with self.lock:
+                if generation == self.generation:
+                    self.responses[key] = response
+
+        return response
+
+    def build(self, targets, host, schemes):
+        with self.build_lock:
+            spec_dict = self.spec_dir.as_dict(targets=targets)
+
+        if host:
+            spec_dict["host"] = host
+
+        if schemes:
+            spec_dict["schemes"] = schemes.split(",")
+
+        body = json.dumps(spec_dict).encode("utf-8")
+        return hashlib.sha1(body).hexdigest(), body
+
+
+def add_swagger(app, host, name, target, use_cache=False):
     target = target or []
     DOC_URL = build_doc_url(host, target)
     UI_URL = "/ui"
@@ -23,6 +77,8 @@ def add_swagger(app, host, name, target):
     }
 
     swagger_blueprint = get_swaggerui_blueprint(UI_URL, DOC_URL, config=config)
+    doc_cache = DocCache(os.getcwd(), use_cache=use_cache)
+    app.extensions["specd_doc_cache"] = doc_cache
 
     @app.route("/")
     def main():
@@ -30,30 +86,28 @@ def add_swagger(app, host, name, target):
 
     @app.route("/doc")
     def doc():
-        targets = request.args.getlist("target")
-        spec_dir = SpecDir(os.getcwd())
-        spec_dir.exists() or abort(404)
-        spec_dict = spec_dir.as_dict(targets=targets)
-
-        host = request.args.get("host", None)
-        if host:
-            spec_dict["host"] = host
-
-        schemes = request.args.get("schemes", None)
-        if schemes:
-            spec_dict["schemes"] = schemes.split(",")
+        doc_cache.spec_dir.exists() or abort(404)
+        (etag, body) = doc_cache.get(
+            targets=request.args.getlist("target"),
+            host=request.args.get("host", None),
+            schemes=request.args.get("schemes", None),
+        )
 
-        return jsonify(spec_dict)
+        response = app.response_class(body, mimetype="application/json")
+        response.set_etag(etag)
+        return response.make_conditional(request)
 
     app.register_blueprint(swagger_blueprint, url_prefix=UI_URL)
 
 
-def create_app(include_swagger=True, host=None, name=None, target=None):
+def create_app(
+    include_swagger=True, host=None, name=None, target=None, use_cache=False
+):
     app = Flask(__name__)
     app.config["TESTING"] = True
     app.config["ENV"] = "swagger"
 
     if include_swagger:
-        add_swagger(app, host, name, target)
+        add_swagger(app, host, name, target, use_cache)
 
     return app
@@ -0,0 +1,198 @@
+import collections
+import hashlib
+import os
+import pickle
+
+from .fingerprint import hash_file
+from .graph import DefinitionGraph
+from .utils import canonical_json, write_atomic
+
+# parsed file along with the targets and $ref names found in it
+Entry = collections.namedtuple("Entry", "signature blob targets refs digest")
+
+
+class SpecCache(object):
+    """ On-disk cache of parsed specd files keyed on their stat signature. """
+
+    DIRNAME = ".specd-cache"
+    FNAME = "files.pickle"
+    VERSION = 6
+
+    def __init__(self, spec_dir):
+        self.spec_dir = spec_dir
+        self.files = {}
+        self.specs = {}
+        self.graph = DefinitionGraph()
+        # relative path => (stat signature, content hash)
+        self.hashes = {}
+        # whether anything was parsed or hashed since loading
+        self.changed = False
+        self.load()
+
+    @property
+    def file_path(self):
+        return self.spec_dir.abspath(self.DIRNAME, self.FNAME)
+
+    def load(self):
+        try:
+            with open(self.file_path, "rb") as file_handle:
+                data = pickle.load(file_handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            data = {}
+
+        if data.get("version") == self.VERSION:
+            self.files = data["files"]
+            self.specs = data["specs"]
+            self.graph = data["graph"]
+            self.hashes = data["hashes"]
+
+    def save(self):
+        data = dict(
+            version=self.VERSION,
+            files=self.files,
+            specs=self.specs,
+            graph=self.graph,
+            hashes=self.hashes,
+        )
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        write_atomic(self.file_path, dumps(data))
+
+    def key(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.spec_dir.root)
+
+    def entries(self, file_paths: list) -> list:
+        """ Returns file entries, only parsing when stat signature changed. """
+        entries = {}
+        missing = []
+
+        for file_path in file_paths:
+            signature = get_signature(file_path)
+            entry = self.files.get(self.key(file_path))
+            if entry is not None and entry.signature == signature:
+                entries[file_path] = entry
+            else:
+                missing.append((file_path, signature))
+
+        self.changed = self.changed or bool(missing)
+        loaded = self.spec_dir.load_files([fp for (fp, _) in missing])
+        for ((file_path, signature), spec) in zip(missing, loaded):
+            entry = self.make_entry(signature, spec)
+            self.files[self.key(file_path)] = entries[file_path] = entry
+
+        return [entries[file_path] for file_path in file_paths]
+
+    def hash_files(self, file_paths: list) -> list:
+        """ Returns content hashes, reading files whose signature changed. """
+        digests = []
+        for file_path in file_paths:
+            key = self.key(file_path)
+            signature = get_signature(file_path)
+            (cached, digest) = self.hashes.get(key, (None, None))
+            if cached != signature:
+                digest = hash_file(file_path)
+                self.hashes[key] = (signature, digest)
+                self.changed = True
+            digests.append(digest)
+        return digests
+
+    def make_entry(self, signature: tuple, spec: dict) -> Entry:
+        targets = frozenset(spec.get("targets") or [])
+        refs = frozenset(self.spec_dir.find_definitions(spec))
+        digest = spec_digest(spec)
+        return Entry(signature, dumps(spec), targets, refs, digest)
+
+    def read_files(self, file_paths: list) -> list:
+        return [pickle.loads(entry.blob) for entry in self.entries(file_paths)]
+
+    def select(self, file_paths: list, targets: set) -> list:
+        """ Returns operation files tagged with any of the targets. """
+        entries = self.entries(file_paths)
+        return [
+            file_path
+            for (file_path, entry) in zip(file_paths, entries)
+            if targets.intersection(entry.targets)
+        ]
+
+    def target_index(self) -> dict:
+        """ Returns target => operation files and definitions it needs. """
+        operations = collections.defaultdict(set)
+        for (key, entry) in self.files.items():
+            for target in entry.targets:
+                operations[target].add(key)
+
+        graph = self.definition_graph()
+        index = {}
+        for (target, keys) in sorted(operations.items()):
+            refs = set().union(*(self.files[key].refs for key in keys))
+            definitions = graph.closure(refs).intersection(graph.adjacency)
+            index[target] = dict(
+                operations=sorted(keys), definitions=sorted(definitions)
+            )
+        return index
+
+    def definition_graph(self) -> DefinitionGraph:
+        """ Returns $ref graph, refreshed from changed definition files. """
+        definitions = self.spec_dir.definitions()
+        entries = self.entries([d.file_path for d in definitions])
+        self.graph.update(
+            {d.name: entry.refs for (d, entry) in zip(definitions, entries)}
+        )
+        return self.graph
+
+    def assemble(self, targets: set, build) -> dict:
+        """ Returns assembled spec for targets, rebuilding on any change. """
+        snapshot = scan(self.spec_dir)
+        signature = hash_snapshot(snapshot)
+        key = tuple(sorted(targets))
+        entry = self.specs.get(key)
+
+        if entry is not None and entry[0] == signature:
+            return pickle.loads(entry[1])
+
+        spec = build(targets)
+        # specs assembled from an older snapshot can never be returned again
+        self.specs = {
+            other: entry
+            for (other, entry) in self.specs.items()
+            if entry[0] == signature
+        }
+        self.specs[key] = (signature, dumps(spec))
+        self.prune(snapshot)
+        self.save()
+        return spec
+
+    def prune(self, snapshot: dict):
+        """ Drops cached files that no longer exist in the specd. """
+        for key in set(self.files).difference(snapshot):
+            del self.files[key]
+        for key in set(self.hashes).difference(snapshot):
+            del self.hashes[key]
+
+
+def dumps(spec: dict) -> bytes:
+    return pickle.dumps(spec, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def spec_digest(spec: dict) -> str:
+    """ Returns a hash of the content, ignoring key order and targets. """
+    content = {key: value for (key, value) in spec.items() if key != "targets"}
+    content = canonical_json(content)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def get_signature(file_path: str) -> tuple:
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def scan(spec_dir) -> dict:
+    """ Returns relative path => stat signature of every specd file. """
+    return {
+        os.path.relpath(file_path, spec_dir.root): get_signature(file_path)
+        for file_path in spec_dir.files()
+    }
+
+
+def hash_snapshot(snapshot: dict) -> str:
+    content = repr(sorted(snapshot.items())).encode("utf-8")
+    return hashlib.sha1(content).hexdigest()
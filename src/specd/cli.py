@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 import pprint
@@ -23,36 +24,109 @@ def cli():
 @click.option(
     "--format", "-f", type=click.Choice(["json", "yaml"]), default="yaml"
 )
-def convert(input_file, output_specd, format):
+@click.option("--jobs", "-j", type=int, help="write files in N processes.")
+def convert(input_file, output_specd, format, jobs):
     """convert a specification file into a specd."""
     input_file = click.format_filename(input_file)
     output_specd = click.format_filename(output_specd)
-    tasks.convert_file_to_specd(input_file, output_specd, format, "snake")
+    summary = tasks.convert_file_to_specd(
+        input_file, output_specd, format, "snake", workers=jobs
+    )
+    click.echo(
+        f"Converted {input_file}: {len(summary.created)} created, "
+        f"{len(summary.merged)} merged, {len(summary.unchanged)} unchanged, "
+        f"{len(summary.skipped)} skipped."
+    )
 
 
 @cli.command()
 @click.argument(
     "output_file",
     "output_specd",
+    required=False,
     type=click.Path(dir_okay=False, resolve_path=True),
 )
 @click.option(
     "--case", "-c", type=click.Choice(["camel", "snake"]), default="snake"
 )
 @click.option("--target", "-t", multiple=True)
-def generate(output_file, target, case):
+@click.option("--cache", is_flag=True, help="reuse parsed files on disk.")
+@click.option("--jobs", "-j", type=int, help="parse files in N processes.")
+@click.option("--watch", "-w", is_flag=True, help="rewrite on file changes.")
+@click.option("--debounce", default=0.5, help="seconds to wait for quiet.")
+@click.option(
+    "--per-target",
+    type=click.Path(file_okay=False, resolve_path=True),
+    help="write one file per target into this directory.",
+)
+@click.option(
+    "--format",
+    "-f",
+    type=click.Choice(["json", "yaml"]),
+    help="output format, else guessed from OUTPUT_FILE (json per target).",
+)
+def generate(
+    output_file, target, case, cache, jobs, watch, debounce, per_target, format
+):
     """create specification file from current specd."""
     input_dir = os.getcwd()
+
+    if per_target:
+        output_files = tasks.convert_specd_to_files(
+            input_dir,
+            per_target,
+            target,
+            format or "json",
+            use_cache=cache,
+            workers=jobs,
+        )
+        click.echo(f"Wrote {len(output_files)} file(s) to {per_target}.")
+        return
+
+    if output_file is None:
+        raise click.UsageError("OUTPUT_FILE or --per-target is required.")
+
     output_file = click.format_filename(output_file)
     output_file = None if os.path.basename(output_file) == "-" else output_file
-    tasks.convert_specd_to_file(input_dir, output_file, target, case)
+
+    if watch:
+        if not output_file:
+            raise click.UsageError("--watch requires an output file.")
+        tasks.watch_specd_to_file(
+            input_dir, output_file, target, format, debounce=debounce
+        )
+        return
+
+    tasks.convert_specd_to_file(
+        input_dir, output_file, target, format, use_cache=cache, workers=jobs
+    )
 
 
 @cli.command()
-def validate():
+@click.option("--cache", is_flag=True, help="reuse parsed files on disk.")
+@click.option("--jobs", "-j", type=int, help="parse files in N processes.")
+@click.option(
+    "--incremental", "-i", is_flag=True, help="only check changed files."
+)
+@click.option("--full", is_flag=True, help="check all files, with -i.")
+@click.option(
+    "--all-errors", "-a", is_flag=True, help="report the errors of every file."
+)
+@click.option("--json", "as_json", is_flag=True, help="print errors as JSON.")
+def validate(cache, jobs, incremental, full, all_errors, as_json):
     """validate current specd project."""
     input_dir = os.getcwd()
-    error_message = tasks.validate_specd(input_dir)
+    if all_errors or as_json:
+        report_file_errors(input_dir, cache, jobs, as_json)
+        return
+
+    error_message = tasks.validate_specd(
+        input_dir,
+        use_cache=cache,
+        workers=jobs,
+        incremental=incremental,
+        full=full,
+    )
     if error_message:
         click.echo(f"Validation failed: {error_message}")
         sys.exit(1)
@@ -60,33 +134,83 @@ def validate():
         click.echo("Successfully validated.")
 
 
+def report_file_errors(input_dir, cache, jobs, as_json):
+    errors = tasks.check_specd(input_dir, use_cache=cache, workers=jobs)
+    if as_json:
+        click.echo(json.dumps([error._asdict() for error in errors], indent=2))
+    else:
+        for error in errors:
+            click.echo(f"{error.file_path}#{error.pointer}: {error.message}")
+        click.echo(
+            f"Validation failed: {len(errors)} error(s)."
+            if errors
+            else "Successfully validated."
+        )
+
+    if errors:
+        sys.exit(1)
+
+
 @cli.command()
 @click.option("--host", "-h", default=None)
 @click.option("--name", "-n", default=None)
 @click.option("--target", "-t", multiple=True)
-def swagger(host, name, target):
+@click.option("--cache", is_flag=True, help="reuse parsed files on disk.")
+def swagger(host, name, target, cache):
     """start a flask app for swagger UI."""
-    create_app(include_swagger=True, host=host, name=name, target=target).run()
+    create_app(
+        include_swagger=True,
+        host=host,
+        name=name,
+        target=target,
+        use_cache=cache,
+    ).run()
 
 
 @cli.command()
 @click.argument("one", type=click.Path(exists=True, resolve_path=True))
 @click.argument("two", type=click.Path(exists=True, resolve_path=True))
-def diff(one, two):
+@click.option("--cache", is_flag=True, help="reuse parsed files on disk.")
+@click.option("--jobs", "-j", type=int, help="parse and diff in N processes.")
+def diff(one, two, cache, jobs):
     """show path/defn differences between two specs."""
     one = click.format_filename(one)
     two = click.format_filename(two)
     click.echo(f"diff: {one} & {two}")
-    result = tasks.diff_specifications(one, two)
-
-    for (keys, value) in result.items():
-        for key in keys:
-            click.echo(f"{key} > ", nl=False)
-        if value:
-            print("Diff")
-            pprint.pprint(value, indent=6, width=120, depth=5)
-        else:
-            print("Same")
+    result = tasks.compare_specifications(
+        one, two, use_cache=cache, workers=jobs
+    )
+
+    for keys in result.added:
+        click.echo(f"+ {' > '.join(keys)}")
+    for keys in result.removed:
+        click.echo(f"- {' > '.join(keys)}")
+    for (keys, value) in result.changed.items():
+        click.echo(f"~ {' > '.join(keys)}")
+        pprint.pprint(value, indent=6, width=120, depth=5)
+
+
+@cli.command("hash")
+@click.argument(
+    "input_dir",
+    default=".",
+    type=click.Path(exists=True, file_okay=False, resolve_path=True),
+)
+@click.option("--target", "-t", multiple=True)
+@click.option("--cache", is_flag=True, help="reuse file hashes on disk.")
+@click.option("--tree", is_flag=True, help="also show hash of every folder.")
+def hash_(input_dir, target, cache, tree):
+    """show content hash of a specd."""
+    input_dir = click.format_filename(input_dir)
+    fingerprint = tasks.fingerprint_specd(
+        input_dir, targets=target, use_cache=cache
+    )
+    click.echo(fingerprint.digest)
+
+    if tree:
+        for (key, digest) in sorted(fingerprint.nodes.items()):
+            if os.path.isdir(os.path.join(input_dir, key)):
+                click.echo(f"{digest}  {key}")
 
 
 @cli.command()
@@ -0,0 +1,98 @@
+import collections
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from dictdiffer import diff
+
+from .cache import Entry, spec_digest
+from .model import SpecDir, map_in_pool
+from .utils import file_path_to_dict
+
+# keys of paths and definitions only in one or two, and deltas of changed
+SpecDiff = collections.namedtuple("SpecDiff", "added removed changed")
+
+
+def index_spec(spec: dict) -> dict:
+    """ Returns key => (digest, spec) of a spec's operations and definitions,
+        keyed like ("paths", url, method) and ("definitions", name). """
+    index = {}
+    for (name, def_spec) in spec.get("definitions", {}).items():
+        index[("definitions", name)] = (spec_digest(def_spec), def_spec)
+
+    for (url, path_spec) in spec.get("paths", {}).items():
+        for (method, op_spec) in path_spec.items():
+            index[("paths", url, method)] = (spec_digest(op_spec), op_spec)
+    return index
+
+
+def index_spec_dir(spec_dir: SpecDir) -> dict:
+    """ Returns key => (digest, spec or cache entry) of every specd file.
+        With the file cache, digests are read without unpickling specs. """
+    items = [
+        (("paths", op.path.spec_url, op.method), op.file_path)
+        for op in spec_dir.operations()
+    ] + [
+        (("definitions", definition.name), definition.file_path)
+        for definition in spec_dir.definitions()
+    ]
+    keys = [key for (key, _) in items]
+    file_paths = [file_path for (_, file_path) in items]
+
+    if spec_dir.cache is not None:
+        entries = spec_dir.cache.entries(file_paths)
+        spec_dir.cache.save()
+        return {
+            key: (entry.digest, entry) for (key, entry) in zip(keys, entries)
+        }
+
+    specs = spec_dir.load_files(file_paths)
+    return {key: (spec_digest(spec), spec) for (key, spec) in zip(keys, specs)}
+
+
+def index_item(item: str, use_cache: bool = False, workers: int = None):
+    """ Returns the index of a spec file or a specd directory. """
+    if os.path.isfile(item):
+        return index_spec(file_path_to_dict(item))
+
+    spec_dir = SpecDir(item, use_cache=use_cache)
+    assert spec_dir.exists(), f"Specd not found: {item}"
+    with spec_dir.parallel(workers):
+        return index_spec_dir(spec_dir)
+
+
+def load_spec(value) -> dict:
+    """ Returns the spec of an index value, unpickling a cache entry. """
+    if isinstance(value, Entry):
+        spec = pickle.loads(value.blob)
+        spec.pop("targets", None)
+        return spec
+
+    return {key: spec for (key, spec) in value.items() if key != "targets"}
+
+
+def diff_pair(pair: tuple) -> list:
+    """ Module level so that it can be pickled into worker processes. """
+    return list(diff(*pair))
+
+
+def compare_indexes(one: dict, two: dict, workers: int = None) -> SpecDiff:
+    """ Diffs only the entries in both whose digests differ. """
+    changed = sorted(
+        key for key in set(one).intersection(two) if one[key][0] != two[key][0]
+    )
+    pairs = [
+        (load_spec(one[key][1]), load_spec(two[key][1])) for key in changed
+    ]
+
+    if not workers or workers < 2 or len(pairs) < 2:
+        deltas = [diff_pair(pair) for pair in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            deltas = map_in_pool(executor, workers, diff_pair, pairs)
+
+    return SpecDiff(
+        added=sorted(set(two).difference(one)),
+        removed=sorted(set(one).difference(two)),
+        changed=dict(zip(changed, deltas)),
+    )
@@ -0,0 +1,105 @@
+import collections
+import os
+
+from stringcase import camelcase, snakecase
+
+from .model import Definition, Operation, Path, load_spec_file, merge_dicts
+from .utils import dict_to_str, write_atomic
+
+# relative paths of files created, merged into, found to already hold the
+# merged spec, and skipped (an existing meta file)
+ConvertSummary = collections.namedtuple(
+    "ConvertSummary", "created merged unchanged skipped"
+)
+
+
+class BulkWriter(object):
+    """ Writes a whole spec into a specd: folders are made once, then files
+        are merged, serialized and renamed into place in the SpecDir's
+        process pool, if any. """
+
+    def __init__(self, spec_dir):
+        self.spec_dir = spec_dir
+        # one walk up front, instead of an exists() per file
+        self.existing = set(spec_dir.files())
+        # file path => spec, in the order they were added
+        self.jobs = {}
+        self.skipped = []
+
+    def add(self, file_path: str, spec: dict):
+        # entries landing on one file (e.g. /pets and /pets/) are merged in
+        # order, as writing them one after another would have done
+        if file_path in self.jobs:
+            spec = dict(merge_dicts(self.jobs[file_path], spec))
+        self.jobs[file_path] = spec
+
+    def add_paths(self, paths: dict, case: str):
+        for (url, path_spec) in paths.items():
+            path = Path(spec_dir=self.spec_dir, url=url)
+            for (method, op_spec) in path_spec.items():
+                op_spec["operationId"] = clean_operation_id(
+                    op_spec["operationId"], case
+                )
+                operation = Operation(self.spec_dir, path, method)
+                self.add(operation.file_path, op_spec)
+
+    def add_definitions(self, definitions: dict):
+        for (name, def_spec) in definitions.items():
+            self.add(Definition(self.spec_dir, name).file_path, def_spec)
+
+    def add_meta(self, spec: dict):
+        # an existing meta file is left as it is
+        file_path = self.spec_dir.meta.file_path
+        if file_path in self.existing:
+            self.skipped.append(file_path)
+        else:
+            self.add(file_path, spec)
+
+    def write(self) -> ConvertSummary:
+        for folder in sorted({os.path.dirname(fp) for fp in self.jobs}):
+            os.makedirs(folder, exist_ok=True)
+
+        jobs = [
+            (self.spec_dir.format, file_path, spec, file_path in self.existing)
+            for (file_path, spec) in self.jobs.items()
+        ]
+        written = self.spec_dir.map(write_file, jobs)
+
+        results = collections.defaultdict(list)
+        for ((_, file_path, _, merge), was_written) in zip(jobs, written):
+            status = "unchanged"
+            if was_written:
+                status = "merged" if merge else "created"
+            results[status].append(file_path)
+
+        return ConvertSummary(
+            created=self.keys(results["created"]),
+            merged=self.keys(results["merged"]),
+            unchanged=self.keys(results["unchanged"]),
+            skipped=self.keys(self.skipped),
+        )
+
+    def keys(self, file_paths) -> list:
+        root = self.spec_dir.root
+        return sorted(os.path.relpath(fp, root) for fp in file_paths)
+
+
+def clean_operation_id(operation_id: str, case: str) -> str:
+    operation_id = operation_id.replace("-", "").replace(":", "")
+    if case == "snake":
+        return snakecase(operation_id)
+    return camelcase(operation_id)
+
+
+def write_file(job: tuple) -> bool:
+    """ Returns False when a merge would not change the file. Module level
+        so that it can be pickled into worker processes. """
+    (format, file_path, spec, merge) = job
+    if merge:
+        original = load_spec_file(format, file_path)
+        spec = dict(merge_dicts(original, spec))
+        if spec == original:
+            return False
+
+    write_atomic(file_path, dict_to_str(spec, format))
+    return True
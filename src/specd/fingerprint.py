@@ -0,0 +1,33 @@
+import collections
+import hashlib
+import os
+
+# root hash of a specd, and relative path => hash of its files and folders
+Fingerprint = collections.namedtuple("Fingerprint", "digest nodes")
+
+
+def hash_file(file_path: str) -> str:
+    with open(file_path, "rb") as file_handle:
+        return hashlib.sha1(file_handle.read()).hexdigest()
+
+
+def hash_tree(file_hashes: dict) -> Fingerprint:
+    """ Returns Merkle hashes, where a folder hashes the names and hashes
+        of its entries, so a change only alters the hashes above it. """
+    nodes = dict(file_hashes)
+    entries = collections.defaultdict(set, {"": set()})
+    for key in file_hashes:
+        while key:
+            parent = os.path.dirname(key)
+            entries[parent].add(key)
+            key = parent
+
+    # longest first, so every folder is hashed after its entries
+    for path in sorted(entries, key=len, reverse=True):
+        content = "".join(
+            f"{os.path.basename(key)} {nodes[key]}\n"
+            for key in sorted(entries[path])
+        )
+        nodes[path] = hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    return Fingerprint(digest=nodes.pop(""), nodes=nodes)
@@ -0,0 +1,138 @@
+class DefinitionGraph(object):
+    """ Definition $ref adjacency with memoized transitive closures. """
+
+    def __init__(self, adjacency: dict = None):
+        self.adjacency = dict(adjacency or {})
+        self.closures = {}
+
+    def update(self, adjacency: dict) -> set:
+        """ Replaces edges, only dropping closures that saw a change. """
+        changed = {
+            name
+            for name in set(adjacency).union(self.adjacency)
+            if adjacency.get(name) != self.adjacency.get(name)
+        }
+
+        if changed:
+            self.adjacency = dict(adjacency)
+            self.closures = {
+                name: closure
+                for (name, closure) in self.closures.items()
+                if not closure.intersection(changed)
+            }
+
+        return changed
+
+    def reachable(self, name: str) -> frozenset:
+        """ Returns name and every definition it references transitively. """
+        closure = self.closures.get(name)
+
+        if closure is None:
+            seen = {name}
+            todo = [name]
+            while todo:
+                for ref in self.adjacency.get(todo.pop(), ()):
+                    if ref not in seen:
+                        seen.add(ref)
+                        todo.append(ref)
+            closure = self.closures[name] = frozenset(seen)
+
+        return closure
+
+    def closure(self, names) -> set:
+        return set().union(*(self.reachable(name) for name in names))
+
+    def dependents(self, names) -> set:
+        """ Returns names and every definition that references them. """
+        referrers = {}
+        for (name, refs) in self.adjacency.items():
+            for ref in refs:
+                referrers.setdefault(ref, set()).add(name)
+
+        seen = set(names)
+        todo = list(seen)
+        while todo:
+            for referrer in referrers.get(todo.pop(), ()):
+                if referrer not in seen:
+                    seen.add(referrer)
+                    todo.append(referrer)
+        return seen
+
+    def dangling(self) -> dict:
+        """ Returns definition => referenced names with no definition. """
+        dangling = {}
+        for (name, refs) in sorted(self.adjacency.items()):
+            missing = sorted(set(refs).difference(self.adjacency))
+            if missing:
+                dangling[name] = missing
+        return dangling
+
+    def is_self_referencing(self, name: str) -> bool:
+        return name in self.adjacency[name]
+
+    def cycles(self) -> list:
+        """ Returns groups of definitions that reference each other. """
+        components = StrongComponents(self.adjacency).find()
+        return sorted(
+            sorted(component)
+            for component in components
+            if len(component) > 1 or self.is_self_referencing(component[0])
+        )
+
+
+class StrongComponents(object):
+    """ Iterative Tarjan, so long $ref chains don't hit recursion limit. """
+
+    def __init__(self, adjacency: dict):
+        self.adjacency = adjacency
+        self.index = {}
+        self.low = {}
+        self.stack = []
+        self.on_stack = set()
+        self.work = []
+        self.components = []
+
+    def find(self) -> list:
+        for root in sorted(self.adjacency):
+            if root not in self.index:
+                self.visit(root)
+                self.run()
+        return self.components
+
+    def visit(self, node: str):
+        self.index[node] = self.low[node] = len(self.index)
+        self.stack.append(node)
+        self.on_stack.add(node)
+        self.work.append((node, iter(sorted(self.adjacency[node]))))
+
+    def run(self):
+        while self.work:
+            (node, refs) = self.work[-1]
+            if not any(self.descend(node, ref) for ref in refs):
+                self.finish(node)
+
+    def descend(self, node: str, ref: str) -> bool:
+        """ Returns True when ref was pushed to be visited next. """
+        if ref not in self.adjacency:
+            return False
+
+        if ref not in self.index:
+            self.visit(ref)
+            return True
+
+        if ref in self.on_stack:
+            self.low[node] = min(self.low[node], self.index[ref])
+        return False
+
+    def finish(self, node: str):
+        self.work.pop()
+        if self.work:
+            parent = self.work[-1][0]
+            self.low[parent] = min(self.low[parent], self.low[node])
+
+        if self.low[node] == self.index[node]:
+            position = self.stack.index(node)
+            component = self.stack[position:]
+            del self.stack[position:]
+            self.on_stack.difference_update(component)
+            self.components.append(component)
@@ -1,12 +1,17 @@
 import typing
+import collections
+import contextlib
 import enum
+import functools
 import os
 import re
 import json
+from concurrent.futures import ProcessPoolExecutor
 
-import yaml
-
-from .utils import dict_to_str
+from .cache import SpecCache
+from .fingerprint import Fingerprint, hash_file, hash_tree
+from .graph import DefinitionGraph
+from .utils import dict_to_str, load_yaml
 
 
 @enum.unique
@@ -19,11 +24,17 @@ class SpecDir(object):
 
     PATH_PATTERN = re.compile(r"^[\w/{}._]+$")
     DEF_PATTERN = re.compile(r"^[\w_]+$")
+    CHUNK_SIZE = 256
 
-    def __init__(self, root: str, default_format: str = None):
+    def __init__(
+        self, root: str, default_format: str = None, use_cache: bool = False
+    ):
         self.root: str = os.path.abspath(root)
         self.meta: Meta = Meta(self)
         self.format: str = self.meta.determine_format(default_format)
+        self.cache: SpecCache = SpecCache(self) if use_cache else None
+        self.executor: ProcessPoolExecutor = None
+        self.workers: int = None
 
     # functions
 
@@ -38,10 +49,7 @@ class SpecDir(object):
         return dict_to_str(spec, self.format)
 
     def to_spec(self, content: str) -> dict:
-        if self.format == FileFormat.yaml.value:
-            return yaml.load(content, Loader=yaml.FullLoader)
-        else:
-            return json.loads(content)
+        return str_to_spec(content, self.format)
 
     def write_file(self, spec: dict, file_path: str):
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -50,10 +58,40 @@ class SpecDir(object):
         file_handle.close()
 
     def read_file(self, file_path: str):
-        file_handle = open(file_path, "r")
-        content_str = file_handle.read()
-        file_handle.close()
-        return self.to_spec(content_str)
+        return self.read_files([file_path])[0]
+
+    def read_files(self, file_paths: list) -> list:
+        if self.cache is not None:
+            return self.cache.read_files(file_paths)
+        return self.load_files(file_paths)
+
+    def load_file(self, file_path: str):
+        return load_spec_file(self.format, file_path)
+
+    def load_files(self, file_paths: list) -> list:
+        if self.executor is None:
+            return [self.load_file(file_path) for file_path in file_paths]
+
+        load = functools.partial(load_spec_file, self.format)
+        return self.map(load, file_paths)
+
+    def map(self, func, items) -> list:
+        """ Maps items in the process pool, if any, else in this process. """
+        return map_in_pool(self.executor, self.workers, func, items)
+
+    @contextlib.contextmanager
+    def parallel(self, workers: int = None):
+        """ Parses files in a process pool while inside the context. """
+        if not workers or workers < 2 or self.executor is not None:
+            yield self
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            (self.executor, self.workers) = (executor, workers)
+            try:
+                yield self
+            finally:
+                (self.executor, self.workers) = (None, None)
 
     def definitions(self) -> typing.List["Definition"]:
         return [
@@ -65,9 +103,6 @@ class SpecDir(object):
         name = name_or_filename.split(".")[0]
         return Definition(self, name)
 
-    def get_definition_map(self):
-        return dict([(d.name, d) for d in self.definitions()])
-
     def paths(self) -> typing.List["Path"]:
         paths = []
         paths_root = self.abspath(Path.PATHS)
@@ -80,6 +115,57 @@ class SpecDir(object):
     def get_path(self, url: str) -> "Path":
         return Path(self, url)
 
+    def files(self) -> typing.List[str]:
+        """ Returns file paths of the meta file and every specd file. """
+        file_paths = [self.meta.file_path] if self.meta.exists() else []
+        for sub_dir in (Path.PATHS, Definition.DEFINITIONS):
+            for path, _, file_names in os.walk(self.abspath(sub_dir)):
+                file_paths += [os.path.join(path, fn) for fn in file_names]
+        return file_paths
+
+    def fingerprint(self, targets=None) -> Fingerprint:
+        """ Returns Merkle hash of the specd files, or with targets, of the
+            meta file, their operations and the definitions those need. """
+        targets = set(targets or [])
+        file_paths = self.target_files(targets) if targets else self.files()
+
+        if self.cache is not None:
+            digests = self.cache.hash_files(file_paths)
+            if self.cache.changed:
+                self.cache.save()
+        else:
+            digests = [hash_file(file_path) for file_path in file_paths]
+
+        keys = [os.path.relpath(fp, self.root) for fp in file_paths]
+        return hash_tree(dict(zip(keys, digests)))
+
+    def target_files(self, targets: set) -> typing.List[str]:
+        """ Returns file paths that make up the spec of the targets. """
+        operations = self.operations()
+        if self.cache is not None:
+            file_paths = self.cache.select(
+                [op.file_path for op in operations], targets
+            )
+            entries = self.cache.entries(file_paths)
+            refs = set().union(*(entry.refs for entry in entries))
+        else:
+            file_paths = []
+            refs = set()
+            for (op, op_targets, op_spec) in self.read_operations(operations):
+                if targets.intersection(op_targets):
+                    file_paths.append(op.file_path)
+                    refs.update(self.find_definitions(op_spec))
+
+        definitions = [
+            self.get_definition(name)
+            for name in self.definition_graph().closure(refs)
+        ]
+        return [self.meta.file_path] + file_paths + [
+            definition.file_path
+            for definition in definitions
+            if definition.exists()
+        ]
+
     def find_definitions(self, spec: dict):
         for (key, value_) in spec.items():
             # (clever code warning) support descent into lists
@@ -93,58 +179,156 @@ class SpecDir(object):
                     for definition in self.find_definitions(value):
                         yield definition
 
+    def operations(self) -> typing.List["Operation"]:
+        return [op for path in self.paths() for op in path.operations()]
+
+    def read_operations(self, operations: list):
+        """ Yields (operation, targets, spec), reading files in chunks. """
+        for chunk in chunks(operations, self.CHUNK_SIZE):
+            op_specs = self.read_files([op.file_path for op in chunk])
+            for (operation, op_spec) in zip(chunk, op_specs):
+                op_targets = op_spec.pop("targets", None) or []
+                yield (operation, op_targets, op_spec)
+
+    def iter_operations(self, targets: set, sort: bool = False):
+        """ Yields (operation, spec) of operations in the targets. """
+        all_ops = targets == set()
+
+        operations = self.operations()
+        if not all_ops and self.cache is not None:
+            # skip operations the target index knows are not in the targets
+            file_paths = [op.file_path for op in operations]
+            selected = set(self.cache.select(file_paths, targets))
+            operations = [op for op in operations if op.file_path in selected]
+
+        if sort:
+            operations.sort(key=lambda op: op.path.spec_url)
+
+        for (operation, op_targets, op_spec) in self.read_operations(
+            operations
+        ):
+            if all_ops or (targets.intersection(op_targets)):
+                yield (operation, op_spec)
+
     def paths_as_dict(self, targets):
         paths = {}
         found_definitions = set()
-        all_ops = targets == set()
 
-        for path in self.paths():
-            path_spec = {}
+        for (operation, op_spec) in self.iter_operations(targets):
+            url = operation.path.spec_url
+            paths.setdefault(url, {})[operation.method] = op_spec
+            found_definitions.update(self.find_definitions(op_spec))
 
-            for operation in path.operations():
-                op_spec = operation.read()
-                op_targets = op_spec.pop("targets", set())
-                if all_ops or (targets.intersection(op_targets)):
-                    path_spec[operation.method] = op_spec
-                    found_definitions.update(self.find_definitions(op_spec))
+        return paths, found_definitions
 
-            if path_spec:
-                # to allow for trailing forward slash, include #fs at end
-                url = path.url.replace("#fs", "/").replace("\\", "/")
-                paths[url] = path_spec
+    def definition_graph(self) -> DefinitionGraph:
+        """ Returns the $ref graph between all definitions. """
+        if self.cache is not None:
+            return self.cache.definition_graph()
+
+        definitions = self.definitions()
+        def_specs = self.read_files([d.file_path for d in definitions])
+        return DefinitionGraph(
+            {
+                definition.name: frozenset(self.find_definitions(def_spec))
+                for (definition, def_spec) in zip(definitions, def_specs)
+            }
+        )
 
-        return paths, found_definitions
+    def iter_definitions(self, names: list):
+        """ Yields (name, spec) of the definitions, reading files in chunks. """
+        for chunk in chunks(names, self.CHUNK_SIZE):
+            definitions = [self.get_definition(name) for name in chunk]
+            for definition in definitions:
+                if not definition.exists():  # pragma: no cover
+                    raise RuntimeError(
+                        f"Failed to load definition: {definition.name}"
+                    )
 
-    def definitions_as_dict(self, found_definitions):
-        all_definitions = self.get_definition_map()
-        result = {}
-        next_round = found_definitions
+            def_specs = self.read_files([d.file_path for d in definitions])
+            yield from zip(chunk, def_specs)
+
+    def walk_definitions(self, found_definitions):
+        """ Yields (name, spec) of definitions and all they $ref, by round. """
+        seen = set()
+        next_round = set(found_definitions)
 
         while next_round:
-            this_round = next_round
-            next_round = set()
-            for name in this_round:
-                try:
-                    def_spec = all_definitions.get(name).read()
-                    result[name] = def_spec
-                except AttributeError:  # pragma: no cover
-                    raise RuntimeError(f"Failed to load definition: {name}")
-
-                for found_name in self.find_definitions(def_spec):
-                    if found_name not in result:
-                        next_round.add(found_name)
-
-        return result
-
-    def as_dict(self, targets=None):
+            seen.update(next_round)
+            refs = set()
+            # sorted so that read order does not depend on set iteration
+            for (name, def_spec) in self.iter_definitions(sorted(next_round)):
+                refs.update(self.find_definitions(def_spec))
+                yield (name, def_spec)
+            next_round = refs.difference(seen)
+
+    def resolve_definitions(self, found_definitions) -> list:
+        """ Returns sorted names of definitions needed by the found ones. """
+        graph = self.definition_graph()
+        return sorted(graph.closure(found_definitions))
+
+    def definitions_as_dict(self, found_definitions):
+        if self.cache is not None:
+            names = self.resolve_definitions(found_definitions)
+            return dict(self.iter_definitions(names))
+
+        return dict(sorted(self.walk_definitions(found_definitions)))
+
+    def as_dict(self, targets=None, workers: int = None):
         targets = set(targets or [])
+        with self.parallel(workers):
+            if self.cache is not None:
+                return self.cache.assemble(targets, self.build_dict)
+            return self.build_dict(targets)
+
+    def build_dict(self, targets: set):
         spec = self.meta.read()
         (spec["paths"], found_definitions) = self.paths_as_dict(targets)
         spec["definitions"] = self.definitions_as_dict(found_definitions)
         return spec
 
-    def as_str(self, format, targets=None):
-        return dict_to_str(self.as_dict(targets), format)
+    def as_str(self, format, targets=None, workers: int = None):
+        return dict_to_str(self.as_dict(targets, workers), format)
+
+    def as_dicts_per_target(self, targets=None, workers: int = None):
+        """ Returns target => spec, parsing every file only once. """
+        with self.parallel(workers):
+            (buckets, found) = self.bucket_operations(set(targets or []))
+            pool = dict(self.walk_definitions(set().union(*found.values())))
+
+        graph = DefinitionGraph(
+            {
+                name: frozenset(self.find_definitions(def_spec))
+                for (name, def_spec) in pool.items()
+            }
+        )
+        meta = self.meta.read()
+
+        specs = {}
+        for target in sorted(buckets):
+            names = sorted(graph.closure(found[target]))
+            specs[target] = dict(
+                meta,
+                paths=buckets[target],
+                definitions={name: pool[name] for name in names},
+            )
+        return specs
+
+    def bucket_operations(self, targets: set):
+        """ Returns target => paths and target => $ref names in one pass. """
+        buckets = collections.defaultdict(dict)
+        found = collections.defaultdict(set)
+        operations = self.read_operations(self.operations())
+
+        for (operation, op_targets, op_spec) in operations:
+            refs = set(self.find_definitions(op_spec))
+            for target in set(op_targets).intersection(targets or op_targets):
+                paths = buckets[target]
+                url = operation.path.spec_url
+                paths.setdefault(url, {})[operation.method] = op_spec
+                found[target].update(refs)
+
+        return buckets, found
 
 
 class Meta(object):
@@ -199,6 +383,11 @@ class Path(object):
     def abspath(self):
         return self.spec_dir.abspath(self.PATHS, self.url)
 
+    @property
+    def spec_url(self):
+        # to allow for trailing forward slash, include #fs at end
+        return self.url.replace("#fs", "/").replace("\\", "/")
+
     def operations(self):
         return list(
             filter(
@@ -280,6 +469,24 @@ class Definition(object):
         self.write(merged)
 
 
+def chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]  # noqa E203
+
+
+def str_to_spec(content: str, format: str) -> dict:
+    if format == FileFormat.yaml.value:
+        return load_yaml(content)
+    else:
+        return json.loads(content)
+
+
+def load_spec_file(format: str, file_path: str) -> dict:
+    """ Module level so that it can be pickled into worker processes. """
+    with open(file_path, "r") as file_handle:
+        return str_to_spec(file_handle.read(), format)
+
+
 def get_file_names(abspath):
     os.makedirs(abspath, exist_ok=True)
     return [
@@ -289,6 +496,17 @@ def get_file_names(abspath):
     ]
 
 
+def map_in_pool(executor, workers: int, func, items) -> list:
+    """ Sends items to the workers in chunks, about 4 per worker, as one
+        round trip per item costs more than most of the work. """
+    items = list(items)
+    if executor is None or len(items) < 2:
+        return list(map(func, items))
+
+    chunksize = len(items) // (workers * 4) + 1
+    return list(executor.map(func, items, chunksize=chunksize))
+
+
 def merge_dicts(dict1, dict2):
     """ https://stackoverflow.com/a/7205672/1946790 """
     for k in set(dict1.keys()).union(dict2.keys()):
@@ -308,9 +526,12 @@ def create_spec_dict(
     targets: list = None,
     host: str = None,
     schemes: list = None,
+    use_cache: bool = False,
+    workers: int = None,
 ):
 
-    spec_dict = SpecDir(specd_path).as_dict(targets=targets)
+    spec_dir = SpecDir(specd_path, use_cache=use_cache)
+    spec_dict = spec_dir.as_dict(targets=targets, workers=workers)
 
     if host:
         spec_dict["host"] = host
@@ -1,4 +1,22 @@
 from .create import create_sdk
+from .metrics import Observer, MetricsObserver
 from .model import BaseModel
+from .pagination import OffsetPaging, TokenPaging, LinkPaging
+from .response_cache import ResponseCache, MemoryBackend, DiskBackend
+from .retry import RetryPolicy, CircuitBreaker, CircuitOpenError
 
-__all__ = ("create_sdk", "BaseModel")
+__all__ = (
+    "create_sdk",
+    "BaseModel",
+    "Observer",
+    "MetricsObserver",
+    "OffsetPaging",
+    "TokenPaging",
+    "LinkPaging",
+    "ResponseCache",
+    "MemoryBackend",
+    "DiskBackend",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+)
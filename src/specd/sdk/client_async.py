@@ -1,10 +1,26 @@
 import aiohttp
 import asyncio
+import collections
 
 from aiobravado import client
+from aiobravado.http_future import HttpFuture
 from bravado_asyncio.definitions import RunMode
+from bravado_asyncio.http_client import (
+    AsyncioFutureAdapter,
+    AsyncioHTTPResponseAdapter,
+)
 
-from .functions import create_model_type, get_definitions
+from .functions import create_model_type, get_definitions, iter_models
+from .metrics import current_waits, make_trace_config, timed_call
+from .response_cache import call_cached
+from .retry import retry_call
+from .pagination import OffsetPaging, paginate_async
+
+# outcome of one call made by SwaggerClient.map, error is None on success
+CallResult = collections.namedtuple("CallResult", "index kwargs result error")
+
+# calls map keeps in flight when neither it nor the connector sets a limit
+MAP_CONCURRENCY = 10
 
 
 class SwaggerClient(client.SwaggerClient):
@@ -13,13 +29,21 @@ class SwaggerClient(client.SwaggerClient):
     def __init__(self, swagger_spec, also_return_response=False):
         super().__init__(swagger_spec, also_return_response)
         self.headers = {}
+        self._decorators = {}
 
     async def close(self):
         await self.swagger_spec.http_client.client_session.close()
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
     def set_headers(self, headers=None, **kwargs):
         self.headers.update(headers or {})
         self.headers.update(kwargs)
+        self._decorators.clear()
 
     def get_model_type(self, model_name):
         return create_model_type(self.swagger_spec, model_name)
@@ -28,15 +52,51 @@ class SwaggerClient(client.SwaggerClient):
         obj_dict = obj_dict or {}
         return self.get_model_type(model_name)._from_dict(obj_dict)
 
+    def instantiate_many(self, model_name, obj_dicts, validate=True):
+        """ Lazily yields a model per dict, skipping checks if not validate. """
+        return iter_models(self.get_model_type(model_name), obj_dicts, validate)
+
     @property
     def definitions(self):
         return get_definitions(self.swagger_spec)
 
+    def paginate(self, operation, paging=None, **kwargs):
+        """ Async iterates items across pages, prefetching the next page. """
+        return paginate_async(operation, paging or OffsetPaging(), kwargs)
+
+    async def map(
+        self, operation, kwargs_iterable, concurrency=None, ordered=True
+    ):
+        """ Yields a CallResult per kwargs, with at most concurrency calls
+            in flight. Errors are returned in the results, not raised. """
+        connector = self.swagger_spec.http_client.client_session.connector
+        concurrency = (
+            concurrency
+            or connector.limit_per_host
+            or connector.limit
+            or MAP_CONCURRENCY
+        )
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be positive: {concurrency}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        calls = CallWindow(operation, kwargs_iterable, semaphore)
+        try:
+            while await calls.fill():
+                for call_result in await calls.next_done(ordered):
+                    yield call_result
+        finally:
+            calls.cancel()
+
     def _get_resource(self, item):
         """
         :param item: name of the resource to return
         :return: :class:`Resource`
         """
+        decorator = self._decorators.get(item)
+        if decorator is not None:
+            return decorator
+
         resource = self.swagger_spec.resources.get(item)
         if not resource:  # pragma: no cover
             raise AttributeError(
@@ -46,10 +106,62 @@ class SwaggerClient(client.SwaggerClient):
             )
 
         # Wrap bravado-core's Resource and Operation objects in order to
-        # execute a service call via the http_client.
-        return ResourceDecorator(
+        # execute a service call via the http_client, reused until the
+        # headers are set again.
+        decorator = ResourceDecorator(
             self.headers, resource, self.__also_return_response
         )
+        self._decorators[item] = decorator
+        return decorator
+
+
+class CallWindow(object):
+    """ Starts calls lazily, only pulling kwargs while the semaphore allows. """
+
+    def __init__(self, operation, kwargs_iterable, semaphore):
+        self.operation = operation
+        self.kwargs_iter = enumerate(kwargs_iterable)
+        self.semaphore = semaphore
+        self.tasks = collections.deque()
+        self.exhausted = False
+
+    async def fill(self):
+        """ Returns False once every call was started and yielded. """
+        while not self.exhausted and not self.semaphore.locked():
+            await self.semaphore.acquire()
+            (index, kwargs) = next(self.kwargs_iter, (None, None))
+            if index is None:
+                self.semaphore.release()
+                self.exhausted = True
+            else:
+                task = asyncio.ensure_future(self.call(index, kwargs))
+                self.tasks.append(task)
+        return bool(self.tasks)
+
+    async def call(self, index, kwargs):
+        try:
+            future = self.operation(**kwargs)
+            return CallResult(index, kwargs, await future.result(), None)
+        except Exception as error:
+            return CallResult(index, kwargs, None, error)
+        finally:
+            self.semaphore.release()
+
+    async def next_done(self, ordered):
+        if ordered:
+            return [await self.tasks.popleft()]
+
+        (done, _) = await asyncio.wait(
+            self.tasks, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            self.tasks.remove(task)
+        return sorted(task.result() for task in done)
+
+    def cancel(self):
+        """ Cancels calls still in flight when the consumer stops early. """
+        for task in self.tasks:
+            task.cancel()
 
 
 class ResourceDecorator(client.ResourceDecorator):
@@ -57,14 +169,19 @@ class ResourceDecorator(client.ResourceDecorator):
 
     def __init__(self, headers, resource, also_return_response=False):
         self.headers = headers
+        self._operations = {}
         super(ResourceDecorator, self).__init__(resource, also_return_response)
 
     def __getattr__(self, name):
-        return CallableOperation(
-            self.headers,
-            getattr(self.resource, name),
-            self.also_return_response,
-        )
+        operation = self._operations.get(name)
+        if operation is None:
+            operation = CallableOperation(
+                self.headers,
+                getattr(self.resource, name),
+                self.also_return_response,
+            )
+            self._operations[name] = operation
+        return operation
 
 
 class CallableOperation(client.CallableOperation):
@@ -87,20 +204,90 @@ class CallableOperation(client.CallableOperation):
                 if key not in headers:
                     headers[key] = value
 
-    def __call__(self, **op_kwargs):  # pragma: no cover
+    def __call__(self, **op_kwargs):
         self.update_headers(op_kwargs)
-        return super(CallableOperation, self).__call__(**op_kwargs)
+        call = super(CallableOperation, self).__call__
+        swagger_spec = self.operation.swagger_spec
+        observer = getattr(swagger_spec, "observer", None)
+        if observer is not None:
+            call = timed_call(
+                observer,
+                call,
+                self.operation,
+                is_async=True,
+                also_return=self.also_return_response,
+            )
 
+        retry = getattr(swagger_spec, "retry_policy", None)
+        if retry is not None:
+            call = retry_call(retry, call, self.operation, True)
 
-def make_http_client(loop=None, verify_ssl=True, limit_per_host=10):
-    run_mode = RunMode.FULL_ASYNCIO
-    loop = loop or asyncio.get_event_loop()
-    http_client = client.AsyncioClient(run_mode=run_mode, loop=loop)
+        cache = getattr(swagger_spec, "response_cache", None)
+        if cache is None or self.operation.http_method != "get":
+            return call(**op_kwargs)
+        return call_cached(
+            cache,
+            call,
+            self.operation,
+            op_kwargs,
+            is_async=True,
+            also_return=self.also_return_response,
+        )
+
+
+class AsyncioClient(client.AsyncioClient):
+    """ Full asyncio client with its own session over the given connector.
+
+        The parent always opens a default session, so its run mode setup is
+        repeated here rather than replacing the session afterwards.
+    """
 
-    if not verify_ssl:
-        connector = aiohttp.TCPConnector(
-            ssl=verify_ssl, loop=loop, limit_per_host=limit_per_host
+    def __init__(self, connector, loop=None):
+        self.run_mode = RunMode.FULL_ASYNCIO
+        self.loop = loop or asyncio.get_event_loop()
+        self.run_coroutine_func = asyncio.ensure_future
+        self.response_adapter = AsyncioHTTPResponseAdapter
+        self.bravado_future_class = HttpFuture
+        self.future_adapter = AsyncioFutureAdapter
+        self.client_session = TracedSession(
+            aiohttp.ClientSession(
+                connector=connector, trace_configs=[make_trace_config()]
+            )
         )
-        http_client.client_session._connector = connector
 
-    return http_client
+
+class TracedSession(object):
+    """ Hands each request the pool waits list of the call making it, which
+        the trace config callbacks then get as their trace_request_ctx. """
+
+    def __init__(self, session):
+        self.session = session
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("trace_request_ctx", current_waits())
+        return self.session.request(*args, **kwargs)
+
+
+def make_http_client(
+    loop=None,
+    verify_ssl=True,
+    limit_per_host=10,
+    limit=100,
+    keepalive_timeout=15.0,
+    ttl_dns_cache=10,
+    ssl_context=None,
+):
+    """ AsyncioClient with connections capped in total and per host. """
+    loop = loop or asyncio.get_event_loop()
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=ttl_dns_cache,
+        ssl=verify_ssl if ssl_context is None else ssl_context,
+        loop=loop,
+    )
+    return AsyncioClient(connector, loop=loop)
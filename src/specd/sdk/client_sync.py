@@ -1,6 +1,17 @@
+import socket
+import time
+
 from bravado import client
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
 
-from .functions import create_model_type, get_definitions
+from .functions import create_model_type, get_definitions, iter_models
+from .metrics import add_pool_wait, timed_call
+from .response_cache import call_cached
+from .retry import retry_call
+from .pagination import OffsetPaging, paginate
 
 
 class SwaggerClient(client.SwaggerClient):
@@ -9,10 +20,12 @@ class SwaggerClient(client.SwaggerClient):
     def __init__(self, swagger_spec, also_return_response=False):
         super().__init__(swagger_spec, also_return_response)
         self.headers = {}
+        self._decorators = {}
 
     def set_headers(self, headers=None, **kwargs):
         self.headers.update(headers or {})
         self.headers.update(kwargs)
+        self._decorators.clear()
 
     def get_model_type(self, model_name):
         return create_model_type(self.swagger_spec, model_name)
@@ -21,15 +34,36 @@ class SwaggerClient(client.SwaggerClient):
         obj_dict = obj_dict or {}
         return self.get_model_type(model_name)._from_dict(obj_dict)
 
+    def instantiate_many(self, model_name, obj_dicts, validate=True):
+        """ Lazily yields a model per dict, skipping checks if not validate. """
+        return iter_models(self.get_model_type(model_name), obj_dicts, validate)
+
     @property
     def definitions(self):
         return get_definitions(self.swagger_spec)
 
+    def paginate(self, operation, paging=None, **kwargs):
+        """ Lazily yields items across pages, OffsetPaging by default. """
+        return paginate(operation, paging or OffsetPaging(), kwargs)
+
+    def pool_stats(self):
+        """ Returns connection pool usage by host for the http client. """
+        adapters = self.swagger_spec.http_client.session.adapters.values()
+        stats = {}
+        for adapter in adapters:
+            if isinstance(adapter, PoolAdapter):
+                stats.update(adapter.stats())
+        return stats
+
     def _get_resource(self, item):
         """
         :param item: name of the resource to return
         :return: :class:`Resource`
         """
+        decorator = self._decorators.get(item)
+        if decorator is not None:
+            return decorator
+
         resource = self.swagger_spec.resources.get(item)
         if not resource:  # pragma: no cover
             raise AttributeError(
@@ -39,10 +73,13 @@ class SwaggerClient(client.SwaggerClient):
             )
 
         # Wrap bravado-core's Resource and Operation objects in order to
-        # execute a service call via the http_client.
-        return ResourceDecorator(
+        # execute a service call via the http_client, reused until the
+        # headers are set again.
+        decorator = ResourceDecorator(
             self.headers, resource, self.__also_return_response
         )
+        self._decorators[item] = decorator
+        return decorator
 
 
 class ResourceDecorator(client.ResourceDecorator):
@@ -50,14 +87,19 @@ class ResourceDecorator(client.ResourceDecorator):
 
     def __init__(self, headers, resource, also_return_response=False):
         self.headers = headers
+        self._operations = {}
         super(ResourceDecorator, self).__init__(resource, also_return_response)
 
     def __getattr__(self, name):
-        return CallableOperation(
-            self.headers,
-            getattr(self.resource, name),
-            self.also_return_response,
-        )
+        operation = self._operations.get(name)
+        if operation is None:
+            operation = CallableOperation(
+                self.headers,
+                getattr(self.resource, name),
+                self.also_return_response,
+            )
+            self._operations[name] = operation
+        return operation
 
 
 class CallableOperation(client.CallableOperation):
@@ -80,12 +122,119 @@ class CallableOperation(client.CallableOperation):
                 if key not in headers:
                     headers[key] = value
 
-    def __call__(self, **op_kwargs):  # pragma: no cover
+    def __call__(self, **op_kwargs):
         self.update_headers(op_kwargs)
-        return super(CallableOperation, self).__call__(**op_kwargs)
+        call = super(CallableOperation, self).__call__
+        swagger_spec = self.operation.swagger_spec
+        observer = getattr(swagger_spec, "observer", None)
+        if observer is not None:
+            call = timed_call(
+                observer,
+                call,
+                self.operation,
+                also_return=self.also_return_response,
+            )
+
+        retry = getattr(swagger_spec, "retry_policy", None)
+        if retry is not None:
+            call = retry_call(retry, call, self.operation)
+
+        cache = getattr(swagger_spec, "response_cache", None)
+        if cache is None or self.operation.http_method != "get":
+            return call(**op_kwargs)
+        return call_cached(
+            cache,
+            call,
+            self.operation,
+            op_kwargs,
+            also_return=self.also_return_response,
+        )
+
+
+class TimedPoolMixin(object):
+    """ Reports time spent getting a connection, blocking if pool_block. """
 
+    def _get_conn(self, timeout=None):
+        start = time.perf_counter()
+        try:
+            return super(TimedPoolMixin, self)._get_conn(timeout)
+        finally:
+            add_pool_wait(time.perf_counter() - start)
 
-def make_http_client(verify_ssl=True, **_):
+
+class TimedHTTPConnectionPool(TimedPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class TimedHTTPSConnectionPool(TimedPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class PoolAdapter(HTTPAdapter):
+    """ HTTPAdapter with TCP keep-alive that reports its pool usage. """
+
+    def __init__(self, keepalive=True, **kwargs):
+        self.keepalive = keepalive
+        super(PoolAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keepalive:
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        super(PoolAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(
+            http=TimedHTTPConnectionPool, https=TimedHTTPSConnectionPool
+        )
+
+    def stats(self):
+        stats = {}
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            idle = [conn for conn in list(pool.pool.queue) if conn is not None]
+            host = f"{key.key_scheme}://{key.key_host}:{key.key_port}"
+            stats[host] = dict(
+                connections=pool.num_connections,
+                requests=pool.num_requests,
+                idle=len(idle),
+                maxsize=pool.pool.maxsize,
+            )
+        return stats
+
+
+def make_http_client(
+    verify_ssl=True,
+    limit_per_host=10,
+    pool_connections=10,
+    pool_block=False,
+    retries=0,
+    backoff_factor=0.0,
+    status_forcelist=(502, 503, 504),
+    keepalive=True,
+    **_,
+):
+    """ RequestsClient pooling up to limit_per_host connections per host. """
     http_client = client.RequestsClient()
     http_client.session.verify = verify_ssl
+
+    # like requests' own Retry(0, read=False), so that without retries a
+    # read timeout still surfaces as ReadTimeout, not ConnectionError
+    max_retries = Retry(
+        total=retries,
+        read=None if retries else False,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        raise_on_status=False,
+    )
+    adapter = PoolAdapter(
+        keepalive=keepalive,
+        pool_connections=pool_connections,
+        pool_maxsize=limit_per_host,
+        pool_block=pool_block,
+        max_retries=max_retries,
+    )
+    http_client.session.mount("http://", adapter)
+    http_client.session.mount("https://", adapter)
+
     return http_client
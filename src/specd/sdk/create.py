@@ -1,11 +1,24 @@
+import hashlib
+import os
 from types import ModuleType
 
 from bravado.config import CONFIG_DEFAULTS
 from bravado_core.model import ModelMeta
 from bravado_core.spec import Spec
 
-from specd import create_spec_dict
+from specd import SpecDir, create_spec_dict
+from specd.cache import SpecCache
+from specd.utils import canonical_json, write_atomic
 from . import client_async, client_sync
+from .response_cache import ResponseCache
+from .retry import RetryPolicy
+
+VALIDATED_FNAME = "validated.txt"
+# hashes kept on disk per specd, the most recently validated
+MAX_VALIDATED = 100
+
+# hashes of spec dicts that already passed swagger validation
+validated_hashes = set()
 
 
 def create_sdk(
@@ -21,16 +34,29 @@ def create_sdk(
     loop=None,
     schemes=None,
     limit_per_host=10,
+    use_cache=False,
+    model_cache_size=None,
+    http_options=None,
+    cache=None,
+    observer=None,
+    retry=None,
 ):
     """ Convenience method for creating an SDK client. """
     spec_dict = create_spec_dict(
-        specd_path, targets=targets, host=host, schemes=schemes
+        specd_path,
+        targets=targets,
+        host=host,
+        schemes=schemes,
+        use_cache=use_cache,
     )
 
     client_ = client_async if async_enabled else client_sync
 
     http_client = client_.make_http_client(
-        verify_ssl=verify_ssl, loop=loop, limit_per_host=limit_per_host
+        verify_ssl=verify_ssl,
+        loop=loop,
+        limit_per_host=limit_per_host,
+        **(http_options or {}),
     )
 
     # Apply bravado config defaults
@@ -38,10 +64,24 @@ def create_sdk(
 
     also_return_response = config.pop("also_return_response", False)
 
+    # validation is most of the build time, so only run it on new content
+    spec_hash = get_spec_hash(spec_dict)
+    validated_file = get_validated_file(specd_path) if use_cache else None
+    validate = config.get("validate_swagger_spec", True)
+    validate = validate and not is_validated(spec_hash, validated_file)
+    config["validate_swagger_spec"] = validate
+
     swagger_spec = Spec(spec_dict, origin_url, http_client, config)
     swagger_spec.model_overrides = make_model_overrides(models)
+    swagger_spec.model_cache_size = model_cache_size
+    swagger_spec.response_cache = ResponseCache() if cache is True else cache
+    swagger_spec.observer = observer
+    swagger_spec.retry_policy = RetryPolicy() if retry is True else retry
     swagger_spec.build()
 
+    if validate:
+        set_validated(spec_hash, validated_file)
+
     swagger_client = client_.SwaggerClient(
         swagger_spec, also_return_response=also_return_response
     )
@@ -51,6 +91,45 @@ def create_sdk(
     return swagger_client
 
 
+def get_spec_hash(spec_dict):
+    content = canonical_json(spec_dict)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def get_validated_file(specd_path):
+    return SpecDir(specd_path).abspath(SpecCache.DIRNAME, VALIDATED_FNAME)
+
+
+def is_validated(spec_hash, validated_file=None):
+    """ Checks hashes validated in this process and then those on disk. """
+    if spec_hash not in validated_hashes and validated_file:
+        validated_hashes.update(read_validated(validated_file))
+
+    return spec_hash in validated_hashes
+
+
+def set_validated(spec_hash, validated_file=None):
+    """ Appends the hash to those on disk, which other processes may have
+        added to meanwhile, keeping only the last MAX_VALIDATED. """
+    validated_hashes.add(spec_hash)
+
+    if validated_file:
+        hashes = read_validated(validated_file)
+        hashes = [other for other in hashes if other != spec_hash]
+        hashes.append(spec_hash)
+        os.makedirs(os.path.dirname(validated_file), exist_ok=True)
+        write_atomic(validated_file, "\n".join(hashes[-MAX_VALIDATED:]))
+
+
+def read_validated(validated_file) -> list:
+    """ Returns the hashes on disk, oldest first. """
+    try:
+        with open(validated_file) as file_handle:
+            return file_handle.read().split()
+    except FileNotFoundError:
+        return []
+
+
 def make_model_overrides(models):
     model_overrides = {}
     for override in make_iterable(models):
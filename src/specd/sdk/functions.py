@@ -1,4 +1,6 @@
+import collections
 import enum
+import threading
 
 from bravado_core import model
 
@@ -15,6 +17,45 @@ def get_model_spec(swagger_spec, model_name):
     return get_definitions(swagger_spec)[model_name].value
 
 
+class ModelTypes(object):
+    """ Model types built for a spec, least recently used dropped first. """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.types = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.types)
+
+    def __contains__(self, model_name):
+        return model_name in self.types
+
+    def get(self, model_name, build):
+        with self.lock:
+            model_type = self.types.get(model_name)
+            if model_type is not None:
+                self.types.move_to_end(model_name)
+                return model_type
+
+        model_type = build()
+
+        with self.lock:
+            model_type = self.types.setdefault(model_name, model_type)
+            if self.maxsize is not None and len(self.types) > self.maxsize:
+                self.types.popitem(last=False)
+
+        return model_type
+
+
+def get_model_types(swagger_spec):
+    """ Registry of model types, so each model name is built only once. """
+    if not hasattr(swagger_spec, "_model_types"):
+        maxsize = getattr(swagger_spec, "model_cache_size", None)
+        swagger_spec._model_types = ModelTypes(maxsize)
+    return swagger_spec._model_types
+
+
 def create_model_type(
     swagger_spec, model_name, model_spec=None, json_reference=None, **_
 ):
@@ -24,6 +65,15 @@ def create_model_type(
         model_spec = model_name.value
         model_name = model_name.name
 
+    return get_model_types(swagger_spec).get(
+        model_name,
+        lambda: build_model_type(
+            swagger_spec, model_name, model_spec, json_reference
+        ),
+    )
+
+
+def build_model_type(swagger_spec, model_name, model_spec, json_reference):
     model_spec = model_spec or get_model_spec(swagger_spec, model_name)
 
     inherits_from = []
@@ -52,4 +102,22 @@ def create_model_type(
     )
 
 
+def iter_models(model_type, obj_dicts, validate=True):
+    """ Yields model instances, resolving the type's properties only once. """
+    if validate:
+        yield from map(model_type._from_dict, obj_dicts)
+        return
+
+    # same attributes _from_dict sets, minus the additionalProperties check
+    config = model_type._swagger_spec.config
+    missing = dict.fromkeys(model_type._properties)
+    if not config["include_missing_properties"]:
+        missing = {}
+
+    for obj_dict in obj_dicts:
+        instance = object.__new__(model_type)
+        object.__setattr__(instance, "_Model__dict", {**missing, **obj_dict})
+        yield instance
+
+
 model.create_model_type = create_model_type
@@ -0,0 +1,266 @@
+import collections
+import contextlib
+import json
+import threading
+import time
+
+import aiohttp
+
+from .response_cache import with_response
+
+# one SDK call as seen by an observer, status_code is None without response
+Timing = collections.namedtuple(
+    "Timing",
+    "operation_id http_method status_code seconds "
+    "bytes_in bytes_out retries pool_wait",
+)
+
+# seconds spent waiting on a pooled connection by the call this thread is
+# making or resolving
+local = threading.local()
+
+
+def current_waits():
+    return getattr(local, "waits", None)
+
+
+def add_pool_wait(seconds):
+    waits = current_waits()
+    if waits is not None:
+        waits.append(seconds)
+
+
+@contextlib.contextmanager
+def collect_waits(waits):
+    """ Adds this thread's pool waits to waits while inside the context. """
+    previous = current_waits()
+    local.waits = waits
+    try:
+        yield waits
+    finally:
+        local.waits = previous
+
+
+class Observer(object):
+    """ Receives a Timing for every SDK call, the default does nothing. """
+
+    def observe(self, timing):
+        pass
+
+
+class OperationMetrics(object):
+    def __init__(self, num_buckets):
+        self.bucket_counts = [0] * num_buckets
+        self.count = 0
+        self.seconds = 0.0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.pool_wait = 0.0
+
+
+class MetricsObserver(Observer):
+    """ Aggregates latency histograms and totals per operation. """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, buckets=BUCKETS, prefix="specd_sdk"):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self.operations = {}
+        self.lock = threading.Lock()
+
+    def observe(self, timing):
+        index = len(self.buckets)
+        for (position, upper_bound) in enumerate(self.buckets):
+            if timing.seconds <= upper_bound:
+                index = position
+                break
+
+        with self.lock:
+            metrics = self.operations.get(timing.operation_id)
+            if metrics is None:
+                metrics = OperationMetrics(len(self.buckets) + 1)
+                self.operations[timing.operation_id] = metrics
+
+            metrics.bucket_counts[index] += 1
+            metrics.count += 1
+            metrics.seconds += timing.seconds
+            metrics.errors += timing.status_code is None or (
+                timing.status_code >= 400
+            )
+            metrics.bytes_in += timing.bytes_in
+            metrics.bytes_out += timing.bytes_out
+            metrics.retries += timing.retries
+            metrics.pool_wait += timing.pool_wait
+
+    def as_dict(self):
+        """ Returns operation => totals and cumulative bucket counts. """
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        data = {}
+        with self.lock:
+            for (operation_id, metrics) in sorted(self.operations.items()):
+                counts = [
+                    sum(metrics.bucket_counts[: index + 1])
+                    for index in range(len(bounds))
+                ]
+                data[operation_id] = dict(
+                    count=metrics.count,
+                    seconds=metrics.seconds,
+                    buckets=dict(zip(bounds, counts)),
+                    errors=metrics.errors,
+                    bytes_in=metrics.bytes_in,
+                    bytes_out=metrics.bytes_out,
+                    retries=metrics.retries,
+                    pool_wait=metrics.pool_wait,
+                )
+        return data
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=4)
+
+    def to_prometheus(self):
+        """ Returns the metrics in the Prometheus text exposition format. """
+        data = self.as_dict()
+        name = f"{self.prefix}_request_seconds"
+        lines = [
+            f"# HELP {name} SDK call latency by operation.",
+            f"# TYPE {name} histogram",
+        ]
+        for (operation_id, values) in data.items():
+            label = f'operation="{operation_id}"'
+            for (bound, count) in values["buckets"].items():
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f"{name}_sum{{{label}}} {values['seconds']}")
+            lines.append(f"{name}_count{{{label}}} {values['count']}")
+
+        for (key, suffix) in COUNTERS:
+            counter = f"{self.prefix}_{suffix}"
+            lines.append(f"# TYPE {counter} counter")
+            for (operation_id, values) in data.items():
+                label = f'operation="{operation_id}"'
+                lines.append(f"{counter}{{{label}}} {values[key]}")
+
+        return "\n".join(lines) + "\n"
+
+
+# (as_dict key, Prometheus metric suffix) of the per-operation counters
+COUNTERS = (
+    ("errors", "errors_total"),
+    ("bytes_in", "response_bytes_total"),
+    ("bytes_out", "request_bytes_total"),
+    ("retries", "retries_total"),
+    ("pool_wait", "pool_wait_seconds_total"),
+)
+
+
+def get_bytes_in(response):
+    length = response.headers.get("Content-Length")
+    if length is not None:
+        return int(length)
+    content = getattr(getattr(response, "_delegate", None), "content", b"")
+    return len(content) if isinstance(content, bytes) else 0
+
+
+def get_bytes_out(response):
+    # requests keeps the PreparedRequest, aiohttp a RequestInfo
+    delegate = getattr(response, "_delegate", None)
+    request = getattr(delegate, "request", None) or getattr(
+        delegate, "request_info", None
+    )
+    headers = getattr(request, "headers", None) or {}
+    return int(headers.get("Content-Length") or 0)
+
+
+def get_retries(response):
+    raw = getattr(getattr(response, "_delegate", None), "raw", None)
+    history = getattr(getattr(raw, "retries", None), "history", None)
+    return len(history or ())
+
+
+class TimedFuture(object):
+    """ Wraps a request's future to send its Timing to the observer. """
+
+    def __init__(
+        self, observer, operation, future, also_return_response, waits
+    ):
+        self.observer = observer
+        self.operation = operation
+        self.future = future
+        self.also_return_response = also_return_response
+        self.waits = waits
+        self.start = time.perf_counter()
+
+    def result(self, timeout=None):
+        try:
+            with collect_waits(self.waits):
+                (result, response) = self.future.result(timeout=timeout)
+        except Exception as error:
+            self.record(getattr(error, "response", None))
+            raise
+        return self.finish(result, response)
+
+    def finish(self, result, response):
+        self.record(response)
+        if self.also_return_response:
+            return result, response
+        return result
+
+    def record(self, response):
+        timing = Timing(
+            operation_id=self.operation.operation_id,
+            http_method=self.operation.http_method,
+            status_code=getattr(response, "status_code", None),
+            seconds=time.perf_counter() - self.start,
+            bytes_in=0 if response is None else get_bytes_in(response),
+            bytes_out=0 if response is None else get_bytes_out(response),
+            retries=0 if response is None else get_retries(response),
+            pool_wait=sum(self.waits),
+        )
+        self.observer.observe(timing)
+
+
+class AsyncTimedFuture(TimedFuture):
+    async def result(self, timeout=None):
+        try:
+            (result, response) = await self.future.result(timeout=timeout)
+        except Exception as error:
+            self.record(getattr(error, "response", None))
+            raise
+        return self.finish(result, response)
+
+
+def timed_call(observer, call, operation, is_async=False, also_return=False):
+    """ Wraps an operation's call so its future reports a Timing. """
+    future_class = AsyncTimedFuture if is_async else TimedFuture
+
+    def call_timed(**op_kwargs):
+        also_return_response = with_response(op_kwargs, also_return)
+        # async requests start here and carry waits in their trace context
+        with collect_waits([]) as waits:
+            future = call(**op_kwargs)
+
+        return future_class(
+            observer, operation, future, also_return_response, waits
+        )
+
+    return call_timed
+
+
+async def on_queued_start(session, context, params):
+    context.queued_at = time.perf_counter()
+
+
+async def on_queued_end(session, context, params):
+    waits = context.trace_request_ctx
+    if waits is not None:
+        waits.append(time.perf_counter() - context.queued_at)
+
+
+def make_trace_config():
+    """ aiohttp trace reporting time spent waiting for the connector. """
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_queued_start.append(on_queued_start)
+    trace_config.on_connection_queued_end.append(on_queued_end)
+    return trace_config
@@ -0,0 +1,139 @@
+import asyncio
+from urllib.parse import parse_qsl, urlsplit
+
+from bravado_core.param import cast_request_param
+from requests.utils import parse_header_links
+
+
+def get_field(result, name):
+    """ Returns a field of a dict or model result, None if name is None. """
+    return result if name is None else result[name]
+
+
+def get_params(operation):
+    """ Returns name => bravado Param of a CallableOperation, else {}. """
+    swagger_operation = getattr(operation, "operation", None)
+    return getattr(swagger_operation, "params", None) or {}
+
+
+def with_response(kwargs):
+    """ Copies kwargs asking for (result, response) back from the call. """
+    kwargs = dict(kwargs)
+    options = dict(kwargs.get("_request_options") or {})
+    options["also_return_response"] = True
+    kwargs["_request_options"] = options
+    return kwargs
+
+
+class OffsetPaging(object):
+    """ Pages by offset and limit params until a page comes back short. """
+
+    def __init__(
+        self, offset="offset", limit="limit", page_size=100, items=None
+    ):
+        self.offset = offset
+        self.limit = limit
+        self.page_size = page_size
+        self.item_field = items
+
+    def first(self, kwargs):
+        kwargs = dict(kwargs)
+        kwargs.setdefault(self.offset, 0)
+        kwargs.setdefault(self.limit, self.page_size)
+        return kwargs
+
+    def items(self, result):
+        return get_field(result, self.item_field) or []
+
+    def next(self, operation, kwargs, result, response, items):
+        if len(items) < kwargs[self.limit]:
+            return None
+        return dict(kwargs, **{self.offset: kwargs[self.offset] + len(items)})
+
+
+class TokenPaging(object):
+    """ Pages by passing the result's next token back as a param. """
+
+    def __init__(
+        self, token="page_token", next_token="next_page_token", items="items"
+    ):
+        self.token = token
+        self.next_token = next_token
+        self.item_field = items
+
+    def first(self, kwargs):
+        return dict(kwargs)
+
+    def items(self, result):
+        return get_field(result, self.item_field) or []
+
+    def next(self, operation, kwargs, result, response, items):
+        token = get_field(result, self.next_token)
+        return dict(kwargs, **{self.token: token}) if token else None
+
+
+class LinkPaging(object):
+    """ Pages by the query params of the response's rel="next" Link. """
+
+    def __init__(self, items=None):
+        self.item_field = items
+
+    def first(self, kwargs):
+        return dict(kwargs)
+
+    def items(self, result):
+        return get_field(result, self.item_field) or []
+
+    def next(self, operation, kwargs, result, response, items):
+        links = parse_header_links(response.headers.get("Link") or "")
+        urls = [link["url"] for link in links if link.get("rel") == "next"]
+        if not urls:
+            return None
+
+        query = dict(parse_qsl(urlsplit(urls[0]).query))
+        params = get_params(operation)
+        for (name, value) in query.items():
+            if name in params:
+                param_type = params[name].param_spec.get("type")
+                query[name] = cast_request_param(param_type, name, value)
+        return dict(kwargs, **query)
+
+
+def paginate(operation, paging, kwargs):
+    """ Yields items of each page, only requesting a page when needed. """
+    page_kwargs = paging.first(kwargs)
+
+    while page_kwargs is not None:
+        future = operation(**with_response(page_kwargs))
+        (result, response) = future.result()
+        items = paging.items(result)
+        yield from items
+        page_kwargs = paging.next(
+            operation, page_kwargs, result, response, items
+        )
+
+
+async def paginate_async(operation, paging, kwargs):
+    """ Yields items of each page, fetching the next page in the meantime. """
+
+    async def fetch(page_kwargs):
+        future = operation(**with_response(page_kwargs))
+        return (page_kwargs,) + tuple(await future.result())
+
+    task = asyncio.ensure_future(fetch(paging.first(kwargs)))
+    try:
+        while task is not None:
+            (page_kwargs, result, response) = await task
+            items = paging.items(result)
+            next_kwargs = paging.next(
+                operation, page_kwargs, result, response, items
+            )
+            task = None
+            if next_kwargs is not None:
+                task = asyncio.ensure_future(fetch(next_kwargs))
+
+            for item in items:
+                yield item
+    finally:
+        if task is not None:
+            task.cancel()
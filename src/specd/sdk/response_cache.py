@@ -0,0 +1,265 @@
+import collections
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+from aiobravado import exception as async_exception
+from bravado import exception as sync_exception
+from bravado.http_future import unmarshal_response_inner
+from bravado_core.response import IncomingResponse
+from requests.structures import CaseInsensitiveDict
+
+from specd.utils import write_atomic
+
+# cached result and response, with the validator and expiry (epoch secs)
+Entry = collections.namedtuple("Entry", "result response etag expires")
+
+
+class CachedResponse(IncomingResponse):
+    """ Status, headers and body of a cached response, which unlike the
+        results unmarshalled from it can always be pickled. """
+
+    def __init__(self, status_code, reason, headers, text):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = CaseInsensitiveDict(headers)
+        self.text = text
+
+    @property
+    def raw_bytes(self):
+        return self.text.encode("utf-8")
+
+    def json(self, **_):
+        return json.loads(self.text)
+
+
+class MemoryBackend(object):
+    """ In-process entries, least recently used dropped past maxsize. """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+class DiskBackend(object):
+    """ Pickled entries in a directory, shared between processes. Results
+        are unmarshalled again from the cached response on lookup, as model
+        instances can't be pickled. """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def file_path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def get(self, key):
+        try:
+            with open(self.file_path(key), "rb") as file_handle:
+                return pickle.load(file_handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def set(self, key, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        content = pickle.dumps(entry._replace(result=None))
+        write_atomic(self.file_path(key), content)
+
+
+class ResponseCache(object):
+    """ Caches GET results by operation, params and selected headers.
+
+        Results are shared between callers, so treat them as read-only.
+    """
+
+    def __init__(self, backend=None, ttl=60, headers=()):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.headers = tuple(headers)
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def stats(self):
+        """ Counts of fresh hits, requests made and 304s among those. """
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            revalidated=self.revalidated,
+            hit_rate=hit_rate,
+        )
+
+    def key(self, operation, op_kwargs):
+        options = op_kwargs.get("_request_options") or {}
+        headers = options.get("headers") or {}
+        content = json.dumps(
+            [
+                operation.operation_id,
+                {k: v for (k, v) in op_kwargs.items() if k[0] != "_"},
+                [headers.get(name) for name in self.headers],
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def lookup(self, operation, op_kwargs):
+        """ Returns (key, entry, is fresh), adding If-None-Match if stale. """
+        key = self.key(operation, op_kwargs)
+        entry = self.backend.get(key)
+        if entry is not None and entry.result is None:
+            result = unmarshal_response_inner(entry.response, operation)
+            entry = entry._replace(result=result)
+
+        if entry is not None and entry.expires > time.time():
+            self.hits += 1
+            return key, entry, True
+
+        self.misses += 1
+        if entry is not None and entry.etag:
+            options = op_kwargs.setdefault("_request_options", {})
+            headers = options.setdefault("headers", {})
+            headers["If-None-Match"] = entry.etag
+
+        return key, entry, False
+
+    def store(self, key, result, response, text):
+        headers = CaseInsensitiveDict(getattr(response, "headers", None) or {})
+        directives = parse_cache_control(headers.get("Cache-Control"))
+
+        if "no-store" not in directives:
+            max_age = directives.get("max-age")
+            ttl = self.ttl if max_age is None else int(max_age)
+            ttl = 0 if "no-cache" in directives else ttl
+            cached = CachedResponse(
+                response.status_code, response.reason, headers, text
+            )
+            entry = Entry(
+                result, cached, headers.get("ETag"), time.time() + ttl
+            )
+            self.backend.set(key, entry)
+
+    def not_modified(self, key, entry):
+        self.revalidated += 1
+        self.backend.set(key, entry._replace(expires=time.time() + self.ttl))
+        return entry.result
+
+
+def parse_cache_control(value):
+    """ Returns directive => value (None when valueless), lower cased. """
+    directives = {}
+    for directive in (value or "").split(","):
+        (name, _, arg) = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def with_response(op_kwargs, default=False):
+    """ Asks the call for its response too, returning whether the caller
+        did, per its request options or else the client's default. """
+    options = op_kwargs.setdefault("_request_options", {})
+    also_return_response = options.get("also_return_response", default)
+    options["also_return_response"] = True
+    return also_return_response
+
+
+class CachedFuture(object):
+    """ Future of a fresh cached result, without a request being made. With
+        also_return_response, the cached response is returned along. """
+
+    def __init__(self, entry, also_return_response):
+        self.entry = entry
+        self.also_return_response = also_return_response
+
+    def result(self, timeout=None):
+        if self.also_return_response:
+            return self.entry.result, self.entry.response
+        return self.entry.result
+
+
+class CachingFuture(object):
+    """ Wraps a request's future to store its result, or reuse it on 304. """
+
+    not_modified_errors = (sync_exception.HTTPNotModified,)
+
+    def __init__(self, cache, key, entry, future, also_return_response):
+        self.cache = cache
+        self.key = key
+        self.entry = entry
+        self.future = future
+        self.also_return_response = also_return_response
+
+    def result(self, timeout=None):
+        try:
+            (result, response) = self.future.result(timeout=timeout)
+        except self.not_modified_errors as error:
+            return self.finish_not_modified(error)
+        return self.finish(result, response, response.text)
+
+    def finish(self, result, response, text):
+        self.cache.store(self.key, result, response, text)
+        if self.also_return_response:
+            return result, response
+        return result
+
+    def finish_not_modified(self, error):
+        if self.entry is None or error.status_code != 304:
+            raise error
+
+        result = self.cache.not_modified(self.key, self.entry)
+        if self.also_return_response:
+            return result, error.response
+        return result
+
+
+class AsyncCachingFuture(CachingFuture):
+
+    not_modified_errors = (async_exception.HTTPError,)
+
+    async def result(self, timeout=None):
+        try:
+            (result, response) = await self.future.result(timeout=timeout)
+        except self.not_modified_errors as error:
+            return self.finish_not_modified(error)
+        return self.finish(result, response, await response.text)
+
+
+class AsyncCachedFuture(CachedFuture):
+    async def result(self, timeout=None):
+        return CachedFuture.result(self, timeout)
+
+
+def call_cached(
+    cache, call, operation, op_kwargs, is_async=False, also_return=False
+):
+    """ Returns a future for a GET call, served from cache when fresh. """
+    (key, entry, is_fresh) = cache.lookup(operation, op_kwargs)
+    also_return_response = with_response(op_kwargs, also_return)
+
+    if is_fresh:
+        future_class = AsyncCachedFuture if is_async else CachedFuture
+        return future_class(entry, also_return_response)
+
+    future_class = AsyncCachingFuture if is_async else CachingFuture
+    future = call(**op_kwargs)
+    return future_class(cache, key, entry, future, also_return_response)
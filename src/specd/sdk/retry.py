@@ -0,0 +1,230 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from aiobravado import exception as async_exception
+from bravado import exception as sync_exception
+
+# methods safe to repeat, an operation can override with x-idempotent
+IDEMPOTENT_METHODS = frozenset(
+    ["get", "head", "options", "put", "delete", "trace"]
+)
+
+SYNC_ERRORS = (
+    sync_exception.HTTPError,
+    sync_exception.BravadoTimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+ASYNC_ERRORS = (
+    async_exception.HTTPError,
+    aiohttp.ClientConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """ Raised instead of calling a host whose circuit is open. """
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"circuit open for {host}, retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker(object):
+    """ Opens a host's circuit after consecutive failures, then lets one
+        trial call through every reset_timeout until a call succeeds. """
+
+    def __init__(self, failures=5, reset_timeout=30.0):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        # host => (consecutive failures, monotonic time opened or None)
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def is_open(self, host):
+        return self.hosts.get(host, (0, None))[1] is not None
+
+    def check(self, host):
+        with self.lock:
+            (count, opened_at) = self.hosts.get(host, (0, None))
+            if opened_at is None:
+                return
+
+            now = time.monotonic()
+            retry_in = opened_at + self.reset_timeout - now
+            if retry_in > 0:
+                raise CircuitOpenError(host, retry_in)
+
+            # half open, others wait while this trial call is made
+            self.hosts[host] = (count, now)
+
+    def record(self, host, succeeded):
+        with self.lock:
+            if succeeded:
+                self.hosts.pop(host, None)
+                return
+
+            count = self.hosts.get(host, (0, None))[0] + 1
+            opened_at = time.monotonic() if count >= self.failures else None
+            self.hosts[host] = (count, opened_at)
+
+
+def parse_retry_after(value):
+    """ Returns seconds from a Retry-After of seconds or an HTTP date. """
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RetryPolicy(object):
+    """ Retries idempotent calls that could not connect or got one of the
+        statuses, waiting the response's Retry-After or a jittered
+        exponential backoff. A breaker is told of every outcome. """
+
+    def __init__(
+        self,
+        retries=3,
+        backoff=0.1,
+        max_backoff=10.0,
+        statuses=(429, 502, 503, 504),
+        methods=IDEMPOTENT_METHODS,
+        breaker=None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.lower() for method in methods)
+        self.breaker = breaker
+
+    def is_idempotent(self, operation):
+        idempotent = operation.op_spec.get("x-idempotent")
+        if idempotent is None:
+            return operation.http_method in self.methods
+        return bool(idempotent)
+
+    def is_transient(self, error):
+        status_code = getattr(error, "status_code", None)
+        return status_code is None or status_code in self.statuses
+
+    def delay(self, attempt, response=None):
+        """ Seconds to wait before retry attempt, None if past max_backoff. """
+        headers = getattr(response, "headers", None) or {}
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_backoff else None
+
+        # full jitter spreads out clients that failed at the same time
+        ceiling = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def check(self, host):
+        if self.breaker is not None:
+            self.breaker.check(host)
+
+    def record(self, host, succeeded):
+        if self.breaker is not None:
+            self.breaker.record(host, succeeded)
+
+    def retry_delay(self, operation, host, attempt, error):
+        """ Returns seconds to wait before retrying, None to raise error. """
+        is_transient = self.is_transient(error)
+        self.record(host, not is_transient)
+
+        if not is_transient or attempt >= self.retries:
+            return None
+        if not self.is_idempotent(operation):
+            return None
+        return self.delay(attempt, getattr(error, "response", None))
+
+
+def copy_kwargs(op_kwargs):
+    """ Copies kwargs down to the headers, which each attempt may change. """
+    options = dict(op_kwargs.get("_request_options") or {})
+    options["headers"] = dict(options.get("headers") or {})
+    return dict(op_kwargs, _request_options=options)
+
+
+class RetryingFuture(object):
+    """ Wraps a request's future to make it again while the policy allows. """
+
+    errors = SYNC_ERRORS
+
+    def __init__(self, policy, call, operation, op_kwargs, host):
+        self.policy = policy
+        self.call = call
+        self.operation = operation
+        self.op_kwargs = op_kwargs
+        self.host = host
+        self.attempt = 0
+        self.future = self.start()
+
+    def start(self):
+        self.policy.check(self.host)
+        return self.call(**copy_kwargs(self.op_kwargs))
+
+    def retry_delay(self, error):
+        delay = self.policy.retry_delay(
+            self.operation, self.host, self.attempt, error
+        )
+        self.attempt += 1
+        return delay
+
+    def result(self, timeout=None):
+        while True:
+            try:
+                value = self.future.result(timeout=timeout)
+            except self.errors as error:
+                delay = self.retry_delay(error)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                self.future = self.start()
+            else:
+                self.policy.record(self.host, True)
+                return value
+
+
+class AsyncRetryingFuture(RetryingFuture):
+
+    errors = ASYNC_ERRORS
+
+    async def result(self, timeout=None):
+        while True:
+            try:
+                value = await self.future.result(timeout=timeout)
+            except self.errors as error:
+                delay = self.retry_delay(error)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                self.future = self.start()
+            else:
+                self.policy.record(self.host, True)
+                return value
+
+
+def retry_call(policy, call, operation, is_async=False):
+    """ Wraps an operation's call so its future retries per the policy. """
+    future_class = AsyncRetryingFuture if is_async else RetryingFuture
+    host = urlsplit(operation.swagger_spec.api_url).netloc
+
+    def call_retrying(**op_kwargs):
+        return future_class(policy, call, operation, op_kwargs, host)
+
+    return call_retrying
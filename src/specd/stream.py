@@ -0,0 +1,159 @@
+import itertools
+import json
+import shutil
+import tempfile
+
+from .model import SpecDir, Path, Definition
+from .utils import dump_yaml
+
+
+class JsonWriter(object):
+    """ Writes the same text as json.dumps(spec, indent=4) in pieces. """
+
+    INDENT = " " * 4
+    sort_keys = False
+
+    def encode(self, value, level: int) -> str:
+        value_str = json.dumps(value, indent=4)
+        return value_str.replace("\n", "\n" + self.INDENT * level)
+
+    def begin(self, file_handle):
+        file_handle.write("{")
+
+    def separator(self, file_handle, index: int):
+        if index:
+            file_handle.write(",")
+
+    def end(self, file_handle, count: int):
+        file_handle.write("\n}" if count else "}")
+
+    def field(self, file_handle, key: str, value):
+        file_handle.write(
+            f"\n{self.INDENT}{json.dumps(key)}: {self.encode(value, 1)}"
+        )
+
+    def mapping(self, file_handle, key: str, entries):
+        rendered = (self.render(key, k, value) for (k, value) in entries)
+        self.write_rendered(file_handle, key, rendered)
+
+    def render(self, key: str, entry_key: str, value) -> str:
+        value_str = self.encode(value, 2)
+        return f"\n{self.INDENT * 2}{json.dumps(entry_key)}: {value_str}"
+
+    def write_rendered(self, file_handle, key: str, rendered):
+        file_handle.write(f"\n{self.INDENT}{json.dumps(key)}: {{")
+        count = 0
+        for entry_str in rendered:
+            self.separator(file_handle, count)
+            file_handle.write(entry_str)
+            count += 1
+        file_handle.write(f"\n{self.INDENT}}}" if count else "}")
+
+
+class YamlWriter(object):
+    """ Writes the same text as dump_yaml(spec) in pieces. """
+
+    sort_keys = True
+
+    def begin(self, file_handle):
+        pass
+
+    def separator(self, file_handle, index: int):
+        pass
+
+    def end(self, file_handle, count: int):
+        pass
+
+    def field(self, file_handle, key: str, value):
+        file_handle.write(dump_yaml({key: value}))
+
+    def mapping(self, file_handle, key: str, entries):
+        rendered = (self.render(key, k, value) for (k, value) in entries)
+        self.write_rendered(file_handle, key, rendered)
+
+    def render(self, key: str, entry_key: str, value) -> str:
+        # dumped under its parent key so lines wrap at the same columns
+        return dump_yaml({key: {entry_key: value}})
+
+    def write_rendered(self, file_handle, key: str, rendered):
+        count = 0
+        for entry_str in rendered:
+            # the repeated parent key line is dropped after the first
+            if count:
+                entry_str = entry_str.split("\n", 1)[1]
+            file_handle.write(entry_str)
+            count += 1
+
+        if not count:
+            file_handle.write(dump_yaml({key: {}}))
+
+
+def write_spec(spec_dir: SpecDir, file_handle, format: str, targets=None):
+    """ Writes spec holding only a chunk of parsed files in memory. """
+    targets = set(targets or [])
+    writer = YamlWriter() if format.lower() == "yaml" else JsonWriter()
+    meta = spec_dir.meta.read()
+
+    keys = list(meta)
+    keys += [k for k in (Path.PATHS, Definition.DEFINITIONS) if k not in meta]
+    keys = sorted(keys) if writer.sort_keys else keys
+
+    with tempfile.TemporaryFile("w+") as paths_handle:
+        # paths are written first to find the definitions that are needed
+        found_definitions = set()
+        paths = iter_paths(spec_dir, targets, writer, found_definitions)
+        writer.mapping(paths_handle, Path.PATHS, paths)
+        paths_handle.seek(0)
+
+        writer.begin(file_handle)
+        for (index, key) in enumerate(keys):
+            writer.separator(file_handle, index)
+            if key == Path.PATHS:
+                shutil.copyfileobj(paths_handle, file_handle)
+            elif key == Definition.DEFINITIONS:
+                rendered = render_definitions(
+                    spec_dir, found_definitions, writer
+                )
+                writer.write_rendered(file_handle, key, rendered)
+            else:
+                writer.field(file_handle, key, meta[key])
+        writer.end(file_handle, len(keys))
+
+    if spec_dir.cache is not None:
+        spec_dir.cache.save()
+
+
+def iter_paths(spec_dir: SpecDir, targets: set, writer, found_definitions):
+    """ Yields (url, path spec), adding $ref names to found definitions. """
+    operations = spec_dir.iter_operations(targets, sort=writer.sort_keys)
+    grouped = itertools.groupby(operations, key=lambda op: op[0].path.spec_url)
+
+    for (url, url_operations) in grouped:
+        path_spec = {}
+        for (operation, op_spec) in url_operations:
+            path_spec[operation.method] = op_spec
+            found_definitions.update(spec_dir.find_definitions(op_spec))
+        yield (url, path_spec)
+
+
+def render_definitions(spec_dir: SpecDir, found_definitions: set, writer):
+    """ Yields rendered definitions sorted by name, parsing each once. """
+    key = Definition.DEFINITIONS
+    if spec_dir.cache is not None:
+        names = spec_dir.resolve_definitions(found_definitions)
+        for (name, def_spec) in spec_dir.iter_definitions(names):
+            yield writer.render(key, name, def_spec)
+        return
+
+    # the walk finds names round by round, so entries are spooled to disk
+    # to be sorted, instead of parsing every definition a second time
+    with tempfile.TemporaryFile() as spool:
+        (index, position) = ([], 0)
+        for (name, def_spec) in spec_dir.walk_definitions(found_definitions):
+            content = writer.render(key, name, def_spec).encode("utf-8")
+            index.append((name, position, len(content)))
+            position += spool.write(content)
+
+        for (_, position, size) in sorted(index):
+            spool.seek(position)
+            yield spool.read(size).decode("utf-8")
@@ -1,14 +1,24 @@
 import os
 import typing
-from stringcase import camelcase, snakecase
 
 import click
-from dictdiffer import diff
 from swagger_spec_validator import validator20, SwaggerValidationError
 
-from .model import SpecDir, Path, Operation, Definition, create_spec_dict
-from .utils import file_path_to_dict, str_to_dict
+from .compare import SpecDiff, compare_indexes, index_item
+from .convert import BulkWriter, ConvertSummary
+from .fingerprint import Fingerprint
+from .model import SpecDir, Definition
+from .stream import write_spec
+from .validation import FileChecker, FileError, IncrementalValidator
+from .utils import (
+    atomic_open,
+    dict_to_str,
+    file_path_to_dict,
+    str_to_dict,
+    write_atomic,
+)
 from .walker import generate_definitions
+from .watch import EDIT_ERRORS, MAX_INTERVAL, MIN_INTERVAL, LiveSpec, Watcher
 
 LINTING_CRITERIA = [
     "read_only: false\n",
@@ -26,60 +36,23 @@ LINTING_CRITERIA = [
 
 
 def convert_file_to_specd(
-    input_file: str, output_specd: SpecDir, format: str, case: str
-):
+    input_file: str,
+    output_specd: SpecDir,
+    format: str,
+    case: str,
+    workers: int = None,
+) -> ConvertSummary:
     input_spec = file_path_to_dict(input_file)
     spec_dir = SpecDir(output_specd, format)
 
-    # write paths
-    write_paths(case, input_spec, spec_dir)
-
-    # write definitions
-    write_definitions(input_spec, spec_dir)
-
-    write_meta(input_spec, spec_dir)
-
-
-def write_paths(case, input_spec, spec_dir):
-    for (url, path_spec) in input_spec.pop("paths", {}).items():
-        path = Path(spec_dir=spec_dir, url=url)
-        for (method, operation_spec) in path_spec.items():
-            operation_spec["operationId"] = (
-                operation_spec["operationId"].replace("-", "").replace(":", "")
-            )
-            if case == "snake":
-                operation_spec["operationId"] = snakecase(
-                    operation_spec["operationId"]
-                )
-            else:
-                operation_spec["operationId"] = camelcase(
-                    operation_spec["operationId"]
-                )
-            operation = Operation(spec_dir=spec_dir, path=path, method=method)
-            if operation.exists():
-                click.echo(f"Operation exists, merging: {path} / {method}")
-                operation.merge(operation_spec)
-            else:
-                operation.write(operation_spec)
-
-
-def write_definitions(input_spec, spec_dir):
-    for (name, def_spec) in input_spec.pop("definitions", {}).items():
-        definition = Definition(spec_dir=spec_dir, name=name)
-
-        if definition.exists():
-            click.echo(f"Definition exists, merge: {name}")
-            definition.merge(def_spec)
-        else:
-            definition.write(def_spec)
-
+    writer = BulkWriter(spec_dir)
+    writer.add_paths(input_spec.pop("paths", {}), case)
+    writer.add_definitions(input_spec.pop("definitions", {}))
+    # meta (e.g. not paths or definitions)
+    writer.add_meta(input_spec)
 
-def write_meta(input_spec, spec_dir):
-    # write meta (e.g. not paths or definitions)
-    if spec_dir.meta.exists():
-        click.echo(f"Meta found found, skipping.")
-    else:
-        spec_dir.meta.write(input_spec)
+    with spec_dir.parallel(workers):
+        return writer.write()
 
 
 def guess_format(output_file):
@@ -91,31 +64,106 @@ def convert_specd_to_file(
     output_file: str,
     targets: typing.List[str] = None,
     format: str = None,
+    use_cache: bool = False,
+    workers: int = None,
 ):
-    spec_dir = SpecDir(input_dir)
+    spec_dir = SpecDir(input_dir, use_cache=use_cache)
     assert spec_dir.exists(), f"Specd not found: {input_dir}"
 
     format = format or guess_format(output_file)
-    spec_str = spec_dir.as_str(format, targets)
 
-    if output_file:
-        file_handler = open(output_file, "w+")
-        file_handler.write(spec_str)
-        file_handler.close()
-    else:
-        click.echo(spec_str)  # pragma: no cover
+    with spec_dir.parallel(workers):
+        if output_file:
+            with atomic_open(output_file) as file_handle:
+                write_spec(spec_dir, file_handle, format, targets)
+        else:  # pragma: no cover
+            stdout = click.get_text_stream("stdout")
+            write_spec(spec_dir, stdout, format, targets)
+            click.echo()
 
 
-def validate_specd(input_dir: str) -> str:
+def convert_specd_to_files(
+    input_dir: str,
+    output_dir: str,
+    targets: typing.List[str] = None,
+    format: str = "json",
+    use_cache: bool = False,
+    workers: int = None,
+) -> typing.List[str]:
+    """ Writes <target>.<format> per target, parsing every file once. """
+    spec_dir = SpecDir(input_dir, use_cache=use_cache)
+    assert spec_dir.exists(), f"Specd not found: {input_dir}"
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_files = []
+    specs = spec_dir.as_dicts_per_target(targets, workers=workers)
+
+    for (target, spec) in specs.items():
+        output_file = os.path.join(output_dir, f"{target}.{format.lower()}")
+        write_atomic(output_file, dict_to_str(spec, format))
+        output_files.append(output_file)
+
+    if spec_dir.cache is not None:
+        spec_dir.cache.save()
+
+    return output_files
+
+
+def watch_specd_to_file(
+    input_dir: str,
+    output_file: str,
+    targets: typing.List[str] = None,
+    format: str = None,
+    debounce: float = 0.5,
+    watcher: Watcher = None,
+):
+    """ Rewrites output file, re-parsing only files that have changed. """
+    spec_dir = SpecDir(input_dir)
+    assert spec_dir.exists(), f"Specd not found: {input_dir}"
+
+    format = format or guess_format(output_file)
+    live_spec = LiveSpec(spec_dir, targets)
+    write_atomic(output_file, dict_to_str(live_spec.as_dict(), format))
+
+    # a zero debounce would otherwise re-scan the whole tree non-stop
+    interval = min(max(debounce, MIN_INTERVAL), MAX_INTERVAL)
+    watcher = watcher or Watcher(spec_dir, interval=interval)
+    pending = set()
+    for changed in watcher.changes(debounce):
+        pending.update(changed)
+        try:
+            live_spec.update(pending)
+            spec = live_spec.as_dict()
+        except EDIT_ERRORS as e:
+            # keep the last output, and re-read these files on next change
+            click.echo(f"Not updating {output_file}: {e}")
+            continue
+
+        write_atomic(output_file, dict_to_str(spec, format))
+        click.echo(f"Updated {output_file}: {len(pending)} file(s) changed.")
+        pending = set()
+
+
+def validate_specd(
+    input_dir: str,
+    use_cache: bool = False,
+    workers: int = None,
+    incremental: bool = False,
+    full: bool = False,
+) -> str:
     error_message = None
 
     try:
-        spec_dir = SpecDir(input_dir)
+        # incremental validation keeps its results next to the file cache
+        spec_dir = SpecDir(input_dir, use_cache=use_cache or incremental)
 
-        if spec_dir.exists():
-            validator20.validate_spec(spec_dir.as_dict())
-        else:
+        if not spec_dir.exists():
             error_message = f"Not in a valid specd root directory: {input_dir}"
+        elif incremental:
+            with spec_dir.parallel(workers):
+                IncrementalValidator(spec_dir).validate(full=full)
+        else:
+            validator20.validate_spec(spec_dir.as_dict(workers=workers))
 
     except SwaggerValidationError as e:
         error_message = e.args[0].split("\n")[0]
@@ -123,42 +171,44 @@ def validate_specd(input_dir: str) -> str:
     return error_message
 
 
-def get_spec_dict(item: str) -> dict:
-    if os.path.isfile(item):
-        spec_dict = file_path_to_dict(item)
-    else:
-        spec_dict = create_spec_dict(item)
-
-    return spec_dict
-
+def check_specd(
+    input_dir: str, use_cache: bool = False, workers: int = None
+) -> typing.List[FileError]:
+    """ Returns the errors of every file, validating each on its own. """
+    spec_dir = SpecDir(input_dir, use_cache=use_cache)
+    if not spec_dir.exists():
+        message = f"Not in a valid specd root directory: {input_dir}"
+        return [FileError(input_dir, "", message)]
 
-def get_dict_paths(d: dict):
-    for defn in d.get("definitions", {}):
-        yield ("definitions", defn)
+    with spec_dir.parallel(workers):
+        return FileChecker(spec_dir).check()
 
-    for url, spec in d.get("paths", {}).items():
-        for operation in spec:
-            yield ("paths", url, operation)
 
+def compare_specifications(
+    one: str, two: str, use_cache: bool = False, workers: int = None
+) -> SpecDiff:
+    """ Returns paths and definitions added, removed or changed in two,
+        where either is a spec file or a specd directory. """
+    index_one = index_item(one, use_cache=use_cache, workers=workers)
+    index_two = index_item(two, use_cache=use_cache, workers=workers)
+    return compare_indexes(index_one, index_two, workers=workers)
 
-def resolve(d: dict, keys):
-    for key in keys:
-        d = d[key]
-    return d
 
+def diff_specifications(
+    one: str, two: str, use_cache: bool = False, workers: int = None
+) -> dict:
+    """ Returns keys => deltas of the paths and definitions that changed. """
+    return compare_specifications(one, two, use_cache, workers).changed
 
-def diff_specifications(one, two):
-    one = get_spec_dict(one)
-    two = get_spec_dict(two)
 
-    overlaps = set(get_dict_paths(one)).intersection(set(get_dict_paths(two)))
-
-    diffs = {}
-    for keys in overlaps:
-        delta = list(diff(resolve(one, keys), resolve(two, keys)))
-        diffs[keys] = delta
-
-    return diffs
+def fingerprint_specd(
+    input_dir: str, targets=None, use_cache: bool = False
+) -> Fingerprint:
+    """ Returns Merkle hash of the specd, re-hashing only changed files
+        when the file cache is used. """
+    spec_dir = SpecDir(input_dir, use_cache=use_cache)
+    assert spec_dir.exists(), f"Specd not found: {input_dir}"
+    return spec_dir.fingerprint(targets)
 
 
 def list_specd(input_dir: str):
@@ -1,12 +1,31 @@
+import contextlib
 import json
+import os
 import yaml
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as YamlLoader
+
+
+def load_yaml(content_str: str, loader=None) -> dict:
+    """ Parses YAML using libyaml when PyYAML was built with it. """
+    return yaml.load(content_str, Loader=loader or YamlLoader)
+
+
+def dump_yaml(spec: dict, dumper=None) -> str:
+    """ Emits YAML with the pure-Python dumper, as libyaml folds long
+        quoted scalars differently and would change the bytes written. """
+    dumper = dumper or yaml.SafeDumper
+    return yaml.dump(spec, Dumper=dumper, default_flow_style=False)
+
 
 def str_to_dict(content_str: str) -> dict:
     try:
         return json.loads(content_str)
     except json.JSONDecodeError:
-        return yaml.safe_load(content_str)
+        return load_yaml(content_str)
 
 
 def file_path_to_dict(input_file_path: str) -> dict:
@@ -16,6 +35,39 @@ def file_path_to_dict(input_file_path: str) -> dict:
 
 def dict_to_str(spec: dict, format: str) -> str:
     if format.lower() == "yaml":
-        return yaml.dump(spec, default_flow_style=False)
+        return dump_yaml(spec)
     else:
         return json.dumps(spec, indent=4)
+
+
+def canonical_json(value) -> str:
+    """ JSON with sorted keys, stringified first since YAML keys can mix
+        types (e.g. responses 200 and default) that can't be sorted. """
+    return json.dumps(str_keys(value), sort_keys=True, default=str)
+
+
+def str_keys(value):
+    if isinstance(value, dict):
+        return {str(key): str_keys(item) for (key, item) in value.items()}
+    if isinstance(value, list):
+        return [str_keys(item) for item in value]
+    return value
+
+
+@contextlib.contextmanager
+def atomic_open(file_path: str, mode: str = "w"):
+    """ Yields a temp file beside file_path, renamed into place on success. """
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, mode) as file_handle:
+            yield file_handle
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def write_atomic(file_path: str, content):
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with atomic_open(file_path, mode) as file_handle:
+        file_handle.write(content)
@@ -0,0 +1,320 @@
+import collections
+import functools
+import operator
+import os
+import pickle
+
+from swagger_spec_validator import validator20, SwaggerValidationError
+
+from .cache import dumps
+from .fingerprint import hash_file
+from .graph import DefinitionGraph
+from .model import Definition
+from .utils import write_atomic
+
+# an error found in a specd file, pointer is a JSON pointer into that file
+FileError = collections.namedtuple("FileError", "file_path pointer message")
+
+# stands in for a definition with errors, so those aren't reported again
+STUB_DEFINITION = {"type": "object"}
+
+
+class IncrementalValidator(object):
+    """ Validates files changed since the last passing validation, along
+        with the operations and definitions that $ref them. Needs a
+        SpecDir with its file cache enabled. """
+
+    FNAME = "validated.pickle"
+    VERSION = 1
+
+    def __init__(self, spec_dir):
+        self.spec_dir = spec_dir
+        # relative path => content hash, as of the last passing validation
+        self.hashes = {}
+        # relative path of operation file => operationId
+        self.operation_ids = {}
+        self.load()
+
+    @property
+    def file_path(self):
+        return self.spec_dir.abspath(self.spec_dir.cache.DIRNAME, self.FNAME)
+
+    def load(self):
+        try:
+            with open(self.file_path, "rb") as file_handle:
+                data = pickle.load(file_handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            data = {}
+
+        if data.get("version") == self.VERSION:
+            self.hashes = data["hashes"]
+            self.operation_ids = data["operation_ids"]
+
+    def save(self):
+        data = dict(
+            version=self.VERSION,
+            hashes=self.hashes,
+            operation_ids=self.operation_ids,
+        )
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        write_atomic(self.file_path, dumps(data))
+        self.spec_dir.cache.save()
+
+    def key(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.spec_dir.root)
+
+    def validate(self, full: bool = False) -> dict:
+        """ Returns what was checked, raises SwaggerValidationError. """
+        hashes = hash_files(self.spec_dir)
+        meta_key = self.spec_dir.meta.file_name
+        full = full or hashes.get(meta_key) != self.hashes.get(meta_key)
+
+        if full:
+            checked = self.validate_all()
+        else:
+            checked = self.validate_changed(hashes)
+
+        self.hashes = hashes
+        self.save()
+        return checked
+
+    def validate_all(self) -> dict:
+        spec = self.spec_dir.as_dict()
+        validator20.validate_spec(spec)
+
+        operations = self.spec_dir.operations()
+        self.operation_ids = {}
+        for operation in operations:
+            key = self.key(operation.file_path)
+            op_spec = spec["paths"][operation.path.spec_url][operation.method]
+            self.operation_ids[key] = op_spec.get("operationId")
+
+        return dict(
+            full=True,
+            operations=len(operations),
+            definitions=len(spec["definitions"]),
+        )
+
+    def validate_changed(self, hashes: dict) -> dict:
+        changed = {
+            key
+            for (key, digest) in hashes.items()
+            if self.hashes.get(key) != digest
+        }.union(set(self.hashes).difference(hashes))
+
+        graph = self.spec_dir.definition_graph()
+        affected = graph.dependents(
+            os.path.splitext(os.path.basename(key))[0]
+            for key in changed
+            if key.startswith(Definition.DEFINITIONS + os.sep)
+        )
+
+        operations = self.affected_operations(changed, affected)
+        (paths, refs) = self.read_paths(operations)
+        names = graph.closure(affected.union(refs))
+        names = sorted(names.intersection(graph.adjacency))
+
+        spec = self.spec_dir.meta.read()
+        spec["paths"] = paths
+        spec["definitions"] = dict(self.spec_dir.iter_definitions(names))
+        if paths or names:
+            validator20.validate_spec(spec)
+        self.check_operation_ids()
+
+        return dict(
+            full=False, operations=len(operations), definitions=len(names)
+        )
+
+    def affected_operations(self, changed: set, affected: set) -> list:
+        """ Returns operations changed or referencing affected definitions. """
+        operations = self.spec_dir.operations()
+        keys = [self.key(op.file_path) for op in operations]
+        entries = self.spec_dir.cache.entries(
+            [op.file_path for op in operations]
+        )
+
+        # operations removed since the last validation lose their ids
+        self.operation_ids = {
+            key: self.operation_ids.get(key) for key in keys
+        }
+        return [
+            op
+            for (op, key, entry) in zip(operations, keys, entries)
+            if key in changed or entry.refs.intersection(affected)
+        ]
+
+    def read_paths(self, operations: list):
+        """ Returns paths of the operations and the $ref names they use. """
+        paths = collections.defaultdict(dict)
+        refs = set()
+
+        for (operation, _, op_spec) in self.spec_dir.read_operations(
+            operations
+        ):
+            paths[operation.path.spec_url][operation.method] = op_spec
+            refs.update(self.spec_dir.find_definitions(op_spec))
+            key = self.key(operation.file_path)
+            self.operation_ids[key] = op_spec.get("operationId")
+
+        return dict(paths), refs
+
+    def check_operation_ids(self):
+        """ Unchanged operations are not validated, so check ids across all. """
+        seen = set()
+        for (_, operation_id) in sorted(self.operation_ids.items()):
+            if operation_id is not None and operation_id in seen:
+                raise SwaggerValidationError(
+                    f"Duplicate operationId: {operation_id}"
+                )
+            seen.add(operation_id)
+
+
+def hash_files(spec_dir) -> dict:
+    """ Returns relative path => content hash of every specd file. """
+    return {
+        os.path.relpath(file_path, spec_dir.root): hash_file(file_path)
+        for file_path in spec_dir.files()
+    }
+
+
+class FileChecker(object):
+    """ Validates the meta file, then each definition and operation file on
+        its own within a spec holding just the definitions it needs, so
+        that every file with errors gets reported in one run. """
+
+    def __init__(self, spec_dir):
+        self.spec_dir = spec_dir
+        self.meta = spec_dir.meta.read()
+        self.meta_key = self.key(spec_dir.meta.file_path)
+        # ("paths", url, method) or ("definitions", name) => relative path
+        self.files = {}
+
+    def key(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.spec_dir.root)
+
+    def make_spec(self, paths: dict, definitions: dict) -> dict:
+        return dict(self.meta, paths=paths, definitions=definitions)
+
+    def check(self) -> list:
+        """ Returns FileErrors sorted by file path. """
+        def_specs = self.read_definitions()
+        graph = DefinitionGraph(
+            {
+                name: frozenset(self.spec_dir.find_definitions(def_spec))
+                for (name, def_spec) in def_specs.items()
+            }
+        )
+
+        errors = self.run([(self.meta_key, self.make_spec({}, {}))])
+        (def_errors, failed) = self.check_definitions(graph, def_specs)
+
+        # stub broken definitions, so only their own files report them
+        for name in failed:
+            def_specs[name] = STUB_DEFINITION
+
+        op_errors = self.run(self.operation_jobs(graph, def_specs))
+        return sorted(set(errors + def_errors + op_errors))
+
+    def check_definitions(self, graph, def_specs: dict):
+        """ Returns errors and names of definitions with errors. """
+        # every $ref stubbed first, so each only reports its own errors
+        errors = self.run(self.definition_jobs(graph, def_specs, def_specs))
+        failed = self.failed_names(errors)
+
+        # then again with the others real, as a discriminator may need them
+        errors = self.run(
+            self.definition_jobs(graph, def_specs, failed, names=failed)
+        )
+        return errors, self.failed_names(errors)
+
+    def definition_jobs(self, graph, def_specs: dict, stubs, names=None):
+        for name in sorted(def_specs if names is None else names):
+            definitions = {
+                ref: STUB_DEFINITION if ref in stubs and ref != name else spec
+                for (ref, spec) in self.needed(graph, [name], def_specs).items()
+            }
+            key = self.files[("definitions", name)]
+            yield (key, self.make_spec({}, definitions))
+
+    def failed_names(self, errors: list) -> set:
+        keys = {error.file_path for error in errors}
+        return {
+            name
+            for ((kind, name, *_), key) in self.files.items()
+            if kind == "definitions" and key in keys
+        }
+
+    def read_definitions(self) -> dict:
+        names = []
+        for definition in self.spec_dir.definitions():
+            key = self.key(definition.file_path)
+            self.files[("definitions", definition.name)] = key
+            names.append(definition.name)
+        return dict(self.spec_dir.iter_definitions(sorted(names)))
+
+    def needed(self, graph, refs, def_specs: dict) -> dict:
+        names = sorted(graph.closure(refs).intersection(def_specs))
+        return {name: def_specs[name] for name in names}
+
+    def operation_jobs(self, graph, def_specs: dict):
+        operations = self.spec_dir.operations()
+        for (operation, _, op_spec) in self.spec_dir.read_operations(
+            operations
+        ):
+            url = operation.path.spec_url
+            key = self.key(operation.file_path)
+            self.files[("paths", url, operation.method)] = key
+
+            refs = self.spec_dir.find_definitions(op_spec)
+            paths = {url: {operation.method: op_spec}}
+            definitions = self.needed(graph, refs, def_specs)
+            yield (key, self.make_spec(paths, definitions))
+
+    def run(self, jobs) -> list:
+        jobs = list(jobs)
+        specs = [spec for (_, spec) in jobs]
+        results = self.spec_dir.map(check_spec, specs)
+        return [
+            self.locate(key, *result)
+            for ((key, _), result) in zip(jobs, results)
+            if result is not None
+        ]
+
+    def locate(self, key: str, path: list, message: str) -> FileError:
+        """ Points the error at the file holding that part of the spec. """
+        for size in (3, 2):
+            located = self.files.get(tuple(path[:size]))
+            if located is not None:
+                return FileError(located, to_pointer(path[size:]), message)
+
+        # the rest of the spec, like info, comes from the meta file
+        if path and path[0] not in ("paths", "definitions"):
+            key = self.meta_key
+        return FileError(key, to_pointer(path), message)
+
+
+def check_spec(spec: dict):
+    """ Returns (path, message) of the first error found, None if valid.
+        Module level so that it can be pickled into worker processes. """
+    try:
+        validator20.validate_spec(spec)
+    except SwaggerValidationError as e:
+        cause = e.args[1] if len(e.args) > 1 else None
+        return get_error_path(spec, cause), e.args[0].split("\n")[0]
+    return None
+
+
+def get_error_path(spec: dict, cause) -> list:
+    """ Returns the path of the error's instance in spec, [] if elsewhere,
+        like a default value checked against its schema. """
+    path = list(getattr(cause, "absolute_path", ()))
+    try:
+        value = functools.reduce(operator.getitem, path, spec)
+    except (KeyError, IndexError, TypeError):
+        return []
+    return path if value == getattr(cause, "instance", None) else []
+
+
+def to_pointer(path: list) -> str:
+    parts = [str(part).replace("~", "~0").replace("/", "~1") for part in path]
+    return "".join(f"/{part}" for part in parts)
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+
+import yaml
+
+from .cache import scan
+from .graph import DefinitionGraph
+from .model import SpecDir, Path, Definition
+
+
+# normal while files are being edited: a half-saved file that does not
+# parse or went missing, or a $ref added before its definition exists
+EDIT_ERRORS = (yaml.YAMLError, ValueError, OSError, RuntimeError)
+
+# seconds between scans of a watched specd, whatever the debounce
+MIN_INTERVAL = 0.1
+MAX_INTERVAL = 1.0
+
+
+class Watcher(object):
+    """ Polls a specd's files and notifies subscribers of changes. """
+
+    def __init__(self, spec_dir, interval: float = 1.0):
+        self.spec_dir = spec_dir
+        self.interval = interval
+        self.snapshot = scan(spec_dir)
+        self.callbacks = []
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+        return callback
+
+    def poll(self) -> set:
+        """ Returns relative paths of files changed, added or removed. """
+        snapshot = scan(self.spec_dir)
+        changed = {
+            key
+            for key in set(snapshot).union(self.snapshot)
+            if snapshot.get(key) != self.snapshot.get(key)
+        }
+        self.snapshot = snapshot
+
+        if changed:
+            for callback in self.callbacks:
+                callback(changed)
+
+        return changed
+
+    def changes(self, debounce: float = 0.5):
+        """ Yields changed files once nothing changed for debounce secs. """
+        pending = set()
+        last_change = time.monotonic()
+
+        while not self.stopped.wait(self.interval):
+            changed = self.poll()
+            now = time.monotonic()
+            if changed:
+                pending.update(changed)
+                last_change = now
+            elif pending and now - last_change >= debounce:
+                yield pending
+                pending = set()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.stopped.clear()
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+class LiveSpec(object):
+    """ In-memory spec that re-parses only the files that changed. """
+
+    def __init__(self, spec_dir: SpecDir, targets=None):
+        self.spec_dir = spec_dir
+        self.targets = set(targets or [])
+        self.meta = spec_dir.meta.read()
+        self.operations = {}
+        self.definitions = {}
+        self.refs = {}
+        self.graph = DefinitionGraph()
+
+        operations = [op for p in spec_dir.paths() for op in p.operations()]
+        definitions = spec_dir.definitions()
+        self.update(
+            [self.key(op.file_path) for op in operations]
+            + [self.key(d.file_path) for d in definitions]
+        )
+
+    def key(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.spec_dir.root)
+
+    def update(self, changed):
+        """ Patches the spec with the changed, added or removed files. """
+        (op_keys, def_keys) = ([], [])
+        for key in sorted(changed):
+            if key == self.spec_dir.meta.file_name:
+                self.meta = self.spec_dir.meta.read()
+            elif key.startswith(Path.PATHS + os.sep):
+                op_keys.append(key)
+            elif key.startswith(Definition.DEFINITIONS + os.sep):
+                def_keys.append(key)
+
+        self.update_operations(op_keys)
+        self.update_definitions(def_keys)
+
+    def update_operations(self, keys: list):
+        operations = {}
+        for key in keys:
+            self.operations.pop(key, None)
+            (url, file_name) = os.path.split(key[len(Path.PATHS) :])  # noqa E203
+            operation = self.spec_dir.get_path(url).get_operation(file_name)
+            if operation is not None and operation.exists():
+                operations[key] = operation
+
+        op_specs = self.spec_dir.read_files(
+            [op.file_path for op in operations.values()]
+        )
+        for ((key, operation), op_spec) in zip(operations.items(), op_specs):
+            op_targets = set(op_spec.pop("targets", None) or [])
+            refs = set(self.spec_dir.find_definitions(op_spec))
+            self.operations[key] = (operation, op_targets, refs, op_spec)
+
+    def update_definitions(self, keys: list):
+        definitions = []
+        for key in keys:
+            definition = self.spec_dir.get_definition(os.path.basename(key))
+            self.definitions.pop(definition.name, None)
+            self.refs.pop(definition.name, None)
+            if definition.exists():
+                definitions.append(definition)
+
+        def_specs = self.spec_dir.read_files(
+            [d.file_path for d in definitions]
+        )
+        for (definition, def_spec) in zip(definitions, def_specs):
+            self.definitions[definition.name] = def_spec
+            self.refs[definition.name] = frozenset(
+                self.spec_dir.find_definitions(def_spec)
+            )
+
+        self.graph.update(self.refs)
+
+    def as_dict(self) -> dict:
+        spec = dict(self.meta)
+        paths = {}
+        found_definitions = set()
+
+        # same order as SpecDir.as_dict, so the output matches generate
+        keys = [self.key(op.file_path) for op in self.spec_dir.operations()]
+        for key in filter(self.operations.__contains__, keys):
+            (operation, op_targets, refs, op_spec) = self.operations[key]
+            if not self.targets or self.targets.intersection(op_targets):
+                url = operation.path.spec_url
+                paths.setdefault(url, {})[operation.method] = op_spec
+                found_definitions.update(refs)
+
+        names = sorted(self.graph.closure(found_definitions))
+        missing = set(names).difference(self.definitions)
+        if missing:
+            raise RuntimeError(f"Failed to load definition: {min(missing)}")
+
+        spec["paths"] = paths
+        spec["definitions"] = {name: self.definitions[name] for name in names}
+        return spec
@@ -0,0 +1,40 @@
+import http.server
+import os
+import socketserver
+import tempfile
+import threading
+
+import pytest
+
+from specd import tasks
+
+
+@pytest.fixture()
+def specd_path():
+    return os.path.join(os.path.dirname(__file__), "specs")
+
+
+@pytest.fixture()
+def output_specd():
+    """ Yields a temp dir with petstore.json converted into a specd. """
+    with tempfile.TemporaryDirectory() as output_specd:
+        input_file = os.path.join(os.path.dirname(__file__), "petstore.json")
+        tasks.convert_file_to_specd(input_file, output_specd, "yaml", "camel")
+        yield output_specd
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """ As http.server only has its own from Python 3.7. """
+
+    daemon_threads = True
+
+
+@pytest.fixture()
+def host(socket_enabled, handler):
+    """ Yields host:port of a local server, with the module's handler. """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "127.0.0.1:%s" % server.server_port
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,60 @@
+import asyncio
+import types
+
+
+class Operation(object):
+    """ Stands in for a bravado Operation. """
+
+    def __init__(
+        self, operation_id="listPets", http_method="get", op_spec=None
+    ):
+        self.operation_id = operation_id
+        self.http_method = http_method
+        self.op_spec = op_spec or {}
+        self.swagger_spec = types.SimpleNamespace(api_url="http://api/v1")
+
+
+class Response(object):
+    """ Stands in for an IncomingResponse, its request carrying headers. """
+
+    def __init__(
+        self,
+        status_code=200,
+        reason="OK",
+        headers=None,
+        text="",
+        request_headers=None,
+    ):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers or {}
+        self._text = text
+        request_info = types.SimpleNamespace(headers=request_headers or {})
+        self._delegate = types.SimpleNamespace(request_info=request_info)
+
+    @property
+    def text(self):
+        return self._text
+
+
+class AsyncResponse(Response):
+    """ As the asyncio response adapter, whose text is awaited. """
+
+    @property
+    async def text(self):
+        return self._text
+
+
+class AsyncFuture(object):
+    """ Stands in for an async HttpFuture, resolving after delay seconds. """
+
+    def __init__(self, value=None, error=None, delay=0):
+        self.value = value
+        self.error = error
+        self.delay = delay
+
+    async def result(self, timeout=None):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.value
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from specd import create_app
+from specd.app import DocCache
+
+
+@pytest.fixture()
+def app(output_specd):
+    cwd = os.getcwd()
+    try:
+        os.chdir(output_specd)
+        app = create_app()
+    finally:
+        os.chdir(cwd)
+
+    yield app
+    app.extensions["specd_doc_cache"].watcher.stop()
+
+
+@pytest.fixture()
+def doc_cache(output_specd):
+    doc_cache = DocCache(output_specd)
+    yield doc_cache
+    doc_cache.watcher.stop()
+
+
+def test_doc_cache(app):
+    client = app.test_client()
+
+    response = client.get("/doc?host=example.com&schemes=https")
+    assert response.status_code == 200
+    assert response.json["host"] == "example.com"
+    assert response.json["schemes"] == ["https"]
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/doc?host=example.com&schemes=https",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+    response = client.get("/doc?target=x")
+    assert response.json["paths"] == {}
+    assert response.headers["ETag"] != etag
+
+
+def test_doc_cache_invalidation(doc_cache):
+    (etag, body) = doc_cache.get([], None, None)
+    assert doc_cache.get([], None, None) == (etag, body)
+
+    definition = doc_cache.spec_dir.get_definition("Tag")
+    definition.write(dict(definition.read(), description="changed"))
+    doc_cache.watcher.poll()
+    assert doc_cache.responses == {}
+
+    assert doc_cache.get([], None, None)[0] != etag
@@ -0,0 +1,191 @@
+import os
+
+from specd import SpecDir, create_spec_dict
+from specd.cache import SpecCache
+
+
+def count_loads(spec_dir):
+    loaded = []
+    load_file = spec_dir.load_file
+
+    def counting_load_file(file_path):
+        loaded.append(os.path.relpath(file_path, spec_dir.root))
+        return load_file(file_path)
+
+    spec_dir.load_file = counting_load_file
+    return loaded
+
+
+def count_reads(spec_dir):
+    read = []
+    read_files = spec_dir.cache.read_files
+
+    def counting_read_files(file_paths):
+        read.extend(os.path.relpath(fp, spec_dir.root) for fp in file_paths)
+        return read_files(file_paths)
+
+    spec_dir.cache.read_files = counting_read_files
+    return read
+
+
+def test_cache_as_dict(output_specd):
+    expected = SpecDir(output_specd).as_dict()
+
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    loaded = count_loads(spec_dir)
+    assert spec_dir.as_dict() == expected
+    assert len(loaded) == 27
+    assert os.path.exists(spec_dir.cache.file_path)
+
+    # assembled spec is returned without reading any file
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    loaded = count_loads(spec_dir)
+    assert spec_dir.as_dict() == expected
+    assert loaded == []
+
+    # results are copies, mutation does not leak into cache
+    spec_dir.as_dict()["paths"].clear()
+    assert spec_dir.as_dict() == expected
+
+    # other targets reuse the parsed files
+    assert spec_dir.as_dict(targets=["x"])["paths"] == {}
+    assert loaded == []
+
+
+def test_cache_reparses_changed_files(output_specd):
+    SpecDir(output_specd, use_cache=True).as_dict()
+
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    definition = spec_dir.get_definition("Tag")
+    spec = definition.read()
+    spec["description"] = "A changed tag."
+    definition.write(spec)
+
+    loaded = count_loads(spec_dir)
+    spec_dict = spec_dir.as_dict()
+    assert spec_dict["definitions"]["Tag"] == spec
+    assert loaded == ["definitions/Tag.yaml"]
+
+    # removed files are dropped from the cache
+    os.remove(spec_dir.get_definition("ApiResponse").file_path)
+    spec_dir.as_dict(targets=["x"])
+    assert "definitions/ApiResponse.yaml" not in spec_dir.cache.files
+
+    # as are the specs assembled before the change, whatever their targets
+    assert list(SpecCache(spec_dir).specs) == [("x",)]
+
+
+def test_cache_ignores_corrupt_file(output_specd):
+    spec_dir = SpecDir(output_specd)
+    cache = SpecCache(spec_dir)
+    os.makedirs(os.path.dirname(cache.file_path))
+    with open(cache.file_path, "w") as file_handle:
+        file_handle.write("not a pickle")
+
+    spec_dict = create_spec_dict(output_specd, use_cache=True)
+    assert spec_dict == spec_dir.as_dict()
+    assert SpecCache(spec_dir).specs
+
+
+def test_cache_target_index(output_specd):
+    spec_dir = SpecDir(output_specd, use_cache=True)
+
+    for (url, method) in [("/pet", "post"), ("/user/login", "get")]:
+        operation = spec_dir.get_path(url).get_operation(method)
+        operation.write(dict(operation.read(), targets=["a"]))
+    expected = SpecDir(output_specd).as_dict(targets=["a"])
+    assert set(expected["paths"]) == {"/pet", "/user/login"}
+
+    assert spec_dir.as_dict(targets=["a"]) == expected
+    assert spec_dir.cache.target_index() == {
+        "a": dict(
+            operations=["paths/pet/post.yaml", "paths/user/login/get.yaml"],
+            definitions=["Category", "Pet", "Tag"],
+        )
+    }
+
+    # only the changed operation is parsed to learn its targets,
+    # operations outside the targets are never read from the cache
+    operation = spec_dir.get_path("/store/inventory").get_operation("get")
+    operation.write(dict(operation.read(), description="changed"))
+
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    loaded = count_loads(spec_dir)
+    read = count_reads(spec_dir)
+    assert spec_dir.as_dict(targets=["a"]) == expected
+    assert loaded == ["paths/store/inventory/get.yaml"]
+    assert sorted(read) == [
+        "definitions/Category.yaml",
+        "definitions/Pet.yaml",
+        "definitions/Tag.yaml",
+        "paths/pet/post.yaml",
+        "paths/user/login/get.yaml",
+        "specd.yaml",
+    ]
+
+
+def test_fingerprint(monkeypatch, output_specd):
+    fingerprint = SpecDir(output_specd).fingerprint()
+    assert len(fingerprint.digest) == 40
+    assert "paths/pet/{petId}/get.yaml" in fingerprint.nodes
+
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    assert spec_dir.fingerprint() == fingerprint
+
+    # unchanged files are not read again
+    hashed = []
+    monkeypatch.setattr(
+        "specd.cache.hash_file", lambda fp: hashed.append(fp) or "x"
+    )
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    assert spec_dir.fingerprint() == fingerprint
+    assert hashed == []
+    monkeypatch.undo()
+
+    # a change only alters the hashes of the file and folders above it
+    operation = spec_dir.get_path("/store/inventory").get_operation("get")
+    operation.write(dict(operation.read(), description="changed"))
+    changed = spec_dir.fingerprint()
+    assert changed.digest != fingerprint.digest
+    assert {
+        key
+        for key in changed.nodes
+        if changed.nodes[key] != fingerprint.nodes[key]
+    } == {
+        "paths",
+        "paths/store",
+        "paths/store/inventory",
+        "paths/store/inventory/get.yaml",
+    }
+    assert SpecDir(output_specd).fingerprint() == changed
+
+    # removed files are dropped from the cache
+    os.remove(operation.file_path)
+    spec_dir.as_dict()
+    assert "paths/store/inventory/get.yaml" not in spec_dir.cache.hashes
+
+
+def test_fingerprint_targets(output_specd):
+    spec_dir = SpecDir(output_specd)
+    operation = spec_dir.get_path("/pet").get_operation("post")
+    operation.write(dict(operation.read(), targets=["a"]))
+
+    fingerprint = spec_dir.fingerprint(targets=["a"])
+    assert sorted(fingerprint.nodes) == [
+        "definitions",
+        "definitions/Category.yaml",
+        "definitions/Pet.yaml",
+        "definitions/Tag.yaml",
+        "paths",
+        "paths/pet",
+        "paths/pet/post.yaml",
+        "specd.yaml",
+    ]
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    assert spec_dir.fingerprint(targets=["a"]) == fingerprint
+
+    # operations outside the target do not change its hash
+    definition = spec_dir.get_definition("User")
+    definition.write(dict(definition.read(), description="changed"))
+    assert spec_dir.fingerprint(targets=["a"]) == fingerprint
+    assert SpecDir(output_specd).fingerprint(["a"]) == fingerprint
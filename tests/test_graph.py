@@ -0,0 +1,87 @@
+import os
+import tempfile
+
+from specd import tasks, SpecDir
+from specd.graph import DefinitionGraph
+
+ADJACENCY = {
+    "Pet": frozenset({"Category", "Tag"}),
+    "Category": frozenset(),
+    "Tag": frozenset({"Label"}),
+    "Tree": frozenset({"Tree"}),
+    "Parent": frozenset({"Child"}),
+    "Child": frozenset({"Parent", "Pet"}),
+}
+
+
+def test_closure():
+    graph = DefinitionGraph(ADJACENCY)
+    assert graph.closure(["Category"]) == {"Category"}
+    assert graph.closure(["Pet"]) == {"Pet", "Category", "Tag", "Label"}
+    assert graph.closure(["Child", "Tree"]) == {
+        "Child",
+        "Parent",
+        "Pet",
+        "Category",
+        "Tag",
+        "Label",
+        "Tree",
+    }
+
+
+def test_update_drops_stale_closures():
+    graph = DefinitionGraph(ADJACENCY)
+    graph.closure(ADJACENCY)
+    assert set(graph.closures) == set(ADJACENCY)
+
+    assert graph.update(ADJACENCY) == set()
+    assert set(graph.closures) == set(ADJACENCY)
+
+    adjacency = dict(ADJACENCY, Label=frozenset({"Color"}))
+    assert graph.update(adjacency) == {"Label"}
+    assert set(graph.closures) == {"Category", "Tree"}
+    assert "Color" in graph.closure(["Pet"])
+
+
+def test_dangling_and_cycles():
+    graph = DefinitionGraph(ADJACENCY)
+    assert graph.dangling() == {"Tag": ["Label"]}
+    assert graph.cycles() == [["Child", "Parent"], ["Tree"]]
+    assert DefinitionGraph().cycles() == []
+
+
+def test_spec_dir_definition_graph():
+    with tempfile.TemporaryDirectory() as output_specd:
+        input_file = os.path.join(os.path.dirname(__file__), "petstore.json")
+        tasks.convert_file_to_specd(input_file, output_specd, "yaml", "camel")
+
+        graph = SpecDir(output_specd).definition_graph()
+        assert graph.adjacency["Pet"] == {"Category", "Tag"}
+        assert graph.dangling() == {}
+        assert graph.cycles() == []
+
+        spec_dir = SpecDir(output_specd, use_cache=True)
+        assert spec_dir.definition_graph().adjacency == graph.adjacency
+
+        # resolving definitions with the cached graph does not parse files
+        spec_dict = spec_dir.as_dict()
+        loaded = []
+        spec_dir.load_file = loaded.append
+        assert spec_dir.definitions_as_dict({"Pet"}) == {
+            name: spec_dict["definitions"][name]
+            for name in ["Category", "Pet", "Tag"]
+        }
+        assert loaded == []
+
+
+def test_dependents():
+    graph = DefinitionGraph(ADJACENCY)
+    assert graph.dependents(["Label"]) == {
+        "Label",
+        "Tag",
+        "Pet",
+        "Child",
+        "Parent",
+    }
+    assert graph.dependents(["Tree"]) == {"Tree"}
+    assert graph.dependents([]) == set()
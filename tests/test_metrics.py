@@ -0,0 +1,205 @@
+import asyncio
+import http.server
+import json
+
+import pytest
+from bravado import exception
+
+from specd.sdk import create_sdk, Observer, MetricsObserver
+from specd.sdk import metrics
+
+from .fakes import AsyncFuture, Operation, Response
+
+ROWS = [{"id": index, "name": f"pet {index}"} for index in range(3)]
+
+# headers of an aiohttp request with a body
+REQUEST_HEADERS = {"Content-Length": "12"}
+
+
+class PetsHandler(http.server.BaseHTTPRequestHandler):
+    """ Lists limit pets, a limit of 0 is always unavailable. """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        limit = int(self.path.rsplit("limit=", 1)[-1])
+        content = json.dumps(ROWS[:limit]).encode("utf-8")
+        self.send_response(200 if limit else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    return PetsHandler
+
+
+class ListObserver(Observer):
+    def __init__(self):
+        self.timings = []
+
+    def observe(self, timing):
+        self.timings.append(timing)
+
+
+def test_observe_sync_calls(specd_path, host):
+    observer = ListObserver()
+    sdk = create_sdk(
+        specd_path,
+        host=host,
+        observer=observer,
+        http_options=dict(retries=1),
+    )
+
+    assert sdk.pets.listPets(limit=2).result() == ROWS[:2]
+    (result, response) = sdk.pets.listPets(
+        limit=1, _request_options=dict(also_return_response=True)
+    ).result()
+    assert (result, response.status_code) == (ROWS[:1], 200)
+    with pytest.raises(exception.HTTPServiceUnavailable):
+        sdk.pets.listPets(limit=0).result()
+
+    (two, one, unavailable) = observer.timings
+    assert (two.operation_id, two.http_method) == ("listPets", "get")
+    assert (two.status_code, two.bytes_out, two.retries) == (200, 0, 0)
+    assert two.seconds > 0 and two.pool_wait > 0
+    assert one.bytes_in == len(json.dumps(ROWS[:1]))
+    assert (unavailable.status_code, unavailable.retries) == (503, 1)
+
+
+def test_observe_client_also_return_response(specd_path, host):
+    observer = MetricsObserver()
+    config = dict(also_return_response=True)
+    sdk = create_sdk(specd_path, host=host, config=config, observer=observer)
+
+    (result, response) = sdk.pets.listPets(limit=1).result()
+    assert (result, response.status_code) == (ROWS[:1], 200)
+    assert observer.as_dict()["listPets"]["count"] == 1
+
+
+def test_observe_connection_error(specd_path, socket_enabled):
+    observer = ListObserver()
+    sdk = create_sdk(specd_path, host="127.0.0.1:1", observer=observer)
+
+    with pytest.raises(Exception):
+        sdk.pets.listPets(limit=1).result()
+
+    (timing,) = observer.timings
+    assert (timing.status_code, timing.bytes_in, timing.retries) == (
+        None,
+        0,
+        0,
+    )
+
+
+def test_cache_hits_are_not_observed(specd_path, host):
+    observer = ListObserver()
+    sdk = create_sdk(specd_path, host=host, observer=observer, cache=True)
+
+    for _ in range(3):
+        assert sdk.pets.listPets(limit=1).result() == ROWS[:1]
+    assert len(observer.timings) == 1
+
+
+def timing(seconds, status_code=200, operation_id="listPets"):
+    return metrics.Timing(
+        operation_id=operation_id,
+        http_method="get",
+        status_code=status_code,
+        seconds=seconds,
+        bytes_in=10,
+        bytes_out=2,
+        retries=1,
+        pool_wait=0.5,
+    )
+
+
+def test_metrics_observer():
+    assert Observer().observe(timing(0.05)) is None
+
+    observer = MetricsObserver(buckets=(1, 0.1))
+    observer.observe(timing(0.05))
+    observer.observe(timing(0.5, status_code=500))
+    observer.observe(timing(5, status_code=None))
+    observer.observe(timing(0.1, operation_id="createPets"))
+
+    data = observer.as_dict()
+    assert list(data) == ["createPets", "listPets"]
+    assert data["listPets"] == dict(
+        count=3,
+        seconds=5.55,
+        buckets={"0.1": 1, "1": 2, "+Inf": 3},
+        errors=2,
+        bytes_in=30,
+        bytes_out=6,
+        retries=3,
+        pool_wait=1.5,
+    )
+    assert json.loads(observer.to_json()) == data
+
+    lines = observer.to_prometheus().splitlines()
+    assert lines[:2] == [
+        "# HELP specd_sdk_request_seconds SDK call latency by operation.",
+        "# TYPE specd_sdk_request_seconds histogram",
+    ]
+    assert (
+        'specd_sdk_request_seconds_bucket{operation="listPets",le="1"} 2'
+        in lines
+    )
+    assert 'specd_sdk_request_seconds_count{operation="listPets"} 3' in lines
+    assert "# TYPE specd_sdk_errors_total counter" in lines
+    assert 'specd_sdk_errors_total{operation="listPets"} 2' in lines
+    assert 'specd_sdk_errors_total{operation="createPets"} 0' in lines
+
+
+@pytest.mark.asyncio
+async def test_observe_async_calls():
+    observer = ListObserver()
+
+    def call(_request_options, status_code=201):
+        # the request is started, and queued for a connection, in the call
+        metrics.add_pool_wait(0.25)
+        response = Response(status_code, request_headers=REQUEST_HEADERS)
+        error = None
+        if status_code >= 400:
+            error = exception.HTTPError(response)
+        return AsyncFuture((None, response), error, delay=0.01)
+
+    operation = Operation("createPets", "post")
+    create_pet = metrics.timed_call(observer, call, operation, True)
+    assert await create_pet().result() is None
+    with pytest.raises(exception.HTTPError):
+        await create_pet(status_code=500).result()
+
+    (created, failed) = observer.timings
+    assert (created.http_method, created.status_code) == ("post", 201)
+    assert (created.bytes_in, created.bytes_out) == (0, 12)
+    assert created.seconds >= 0.01 and created.pool_wait == 0.25
+    assert failed.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_connection_queued_trace():
+    trace_config = metrics.make_trace_config()
+
+    async def queue(waits):
+        context = type("Context", (), dict(trace_request_ctx=waits))()
+        for callback in trace_config.on_connection_queued_start:
+            await callback(None, context, None)
+        await asyncio.sleep(0.01)
+        for callback in trace_config.on_connection_queued_end:
+            await callback(None, context, None)
+
+    waits = []
+    await queue(waits)
+    assert len(waits) == 1 and waits[0] >= 0.01
+
+    # requests made outside of an observed call carry no waits list
+    await queue(None)
+    metrics.add_pool_wait(1.0)
+    assert len(waits) == 1
@@ -1,6 +1,7 @@
 import tempfile
 import os
 
+from specd import tasks
 from specd.model import (
     SpecDir,
     Path,
@@ -79,6 +80,9 @@ def test_model_paths():
 
         assert not path.get_operation("post").exists()
 
+        operation.merge(dict(b=dict(d="b")))
+        assert operation.read() == dict(a=1, b=dict(c="a", d="b"))
+
 
 def test_model_definitions():
     with tempfile.TemporaryDirectory() as root_dir:
@@ -94,9 +98,35 @@ def test_model_definitions():
         assert definition.exists()
         assert definition.read() == spec
 
+        definition.merge(dict(a=2))
+        assert definition.read() == dict(a=2, b=dict(c="a"))
+
 
 def test_merge_dicts():
     dict1 = {1: {"a": "A"}, 2: {"b": "B"}}
     dict2 = {2: {"c": "C"}, 3: {"d": "D"}}
     merged = dict(merge_dicts(dict1, dict2))
     assert merged == {1: {"a": "A"}, 2: {"c": "C", "b": "B"}, 3: {"d": "D"}}
+
+
+def test_parallel_as_dict():
+    with tempfile.TemporaryDirectory() as output_specd:
+        input_file = os.path.join(os.path.dirname(__file__), "petstore.json")
+        tasks.convert_file_to_specd(input_file, output_specd, "yaml", "camel")
+
+        spec_dict = SpecDir(output_specd).as_dict()
+        parallel_dict = create_spec_dict(output_specd, workers=2)
+        assert parallel_dict == spec_dict
+        assert list(parallel_dict["paths"]) == list(spec_dict["paths"])
+        assert list(parallel_dict["definitions"]) == list(
+            spec_dict["definitions"]
+        )
+
+        spec_dir = SpecDir(output_specd, use_cache=True)
+        with spec_dir.parallel(workers=2):
+            assert spec_dir.executor is not None
+            assert spec_dir.as_dict(workers=2) == spec_dict
+            assert spec_dir.executor is not None
+            assert spec_dir.map(abs, range(-9, 0)) == list(range(9, 0, -1))
+        assert (spec_dir.executor, spec_dir.workers) == (None, None)
+        assert spec_dir.map(abs, [-1]) == [1]
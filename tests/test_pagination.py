@@ -0,0 +1,148 @@
+import asyncio
+import http.server
+import json
+import os
+
+import pytest
+
+from specd.sdk import create_sdk, OffsetPaging, TokenPaging, LinkPaging
+
+ROWS = [{"id": index, "name": f"pet {index}"} for index in range(7)]
+
+
+class Response(object):
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class PageOperation(object):
+    """ Stands in for a CallableOperation over ROWS, recording its calls. """
+
+    def __init__(self, paging, is_async=False):
+        self.paging = paging
+        self.is_async = is_async
+        self.calls = []
+
+    def __call__(self, _request_options, **kwargs):
+        assert _request_options["also_return_response"] is True
+        self.calls.append(kwargs)
+        return PageFuture(self.page(kwargs), self.is_async)
+
+    def page(self, kwargs):
+        if isinstance(self.paging, OffsetPaging):
+            offset = kwargs["offset"]
+            return (ROWS[offset : offset + kwargs["limit"]], Response())  # noqa
+
+        start = int(kwargs.get("page_token") or 0)
+        rows = ROWS[start : start + 3]  # noqa E203
+        next_start = start + 3 if start + 3 < len(ROWS) else None
+
+        if isinstance(self.paging, TokenPaging):
+            return (dict(items=rows, next_page_token=next_start), Response())
+
+        link = f'</pets?page_token={next_start}>; rel="next"'
+        return (rows, Response(dict(Link=link) if next_start else {}))
+
+
+class PageFuture(object):
+    def __init__(self, page, is_async):
+        self.page = page
+        self.is_async = is_async
+
+    def result(self):
+        if self.is_async:
+            return self.async_result()
+        return self.page
+
+    async def async_result(self):
+        await asyncio.sleep(0)
+        return self.page
+
+
+@pytest.fixture()
+def sdk():
+    specd_path = os.path.join(os.path.dirname(__file__), "specs")
+    return create_sdk(specd_path)
+
+
+@pytest.mark.parametrize(
+    "paging", [OffsetPaging(page_size=3), TokenPaging(), LinkPaging()]
+)
+def test_paginate(sdk, paging):
+    operation = PageOperation(paging)
+    items = sdk.paginate(operation, paging=paging, tag="dog")
+    assert operation.calls == []
+
+    assert next(items) == ROWS[0]
+    assert len(operation.calls) == 1
+    assert [item["id"] for item in items] == list(range(1, 7))
+    assert len(operation.calls) == 3
+    assert all(call["tag"] == "dog" for call in operation.calls)
+
+
+def test_paginate_offset_full_last_page(sdk):
+    operation = PageOperation(OffsetPaging())
+    assert list(sdk.paginate(operation, limit=7)) == ROWS
+    assert [call["offset"] for call in operation.calls] == [0, 7]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("paging", [OffsetPaging(page_size=3), TokenPaging()])
+async def test_paginate_async(paging):
+    specd_path = os.path.join(os.path.dirname(__file__), "specs")
+    async with create_sdk(specd_path, async_enabled=True) as sdk:
+        operation = PageOperation(paging, is_async=True)
+        items = sdk.paginate(operation, paging=paging)
+
+        assert await items.__anext__() == ROWS[0]
+        # the second page is requested while the first is consumed
+        await asyncio.sleep(0.01)
+        assert len(operation.calls) == 2
+
+        assert [item["id"] async for item in items] == list(range(1, 7))
+        assert len(operation.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_paginate_async_close():
+    specd_path = os.path.join(os.path.dirname(__file__), "specs")
+    async with create_sdk(specd_path, async_enabled=True) as sdk:
+        paging = TokenPaging()
+        operation = PageOperation(paging, is_async=True)
+        items = sdk.paginate(operation, paging=paging)
+
+        assert await items.__anext__() == ROWS[0]
+        await items.aclose()
+        await asyncio.sleep(0.01)
+        # the pending prefetch was cancelled before it made its call
+        assert len(operation.calls) == 1
+
+
+class LinkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        limit = int(self.path.rsplit("limit=", 1)[-1])
+        content = json.dumps(ROWS[:limit]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        if limit > 1:
+            link = f'</v1/pets?limit={limit - 1}>; rel="next"'
+            self.send_header("Link", link)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    return LinkHandler
+
+
+def test_paginate_link_header(specd_path, host):
+    sdk = create_sdk(specd_path, host=host)
+    pets = sdk.paginate(sdk.pets.listPets, paging=LinkPaging(), limit=3)
+    assert [pet["id"] for pet in pets] == [0, 1, 2, 0, 1, 0]
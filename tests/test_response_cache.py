@@ -0,0 +1,263 @@
+import http.server
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+from aiobravado import exception as async_exception
+from bravado_asyncio.http_client import (
+    AsyncioFutureAdapter,
+    AsyncioHTTPResponseAdapter,
+)
+
+from specd.sdk import create_sdk, ResponseCache, MemoryBackend, DiskBackend
+from specd.sdk import MetricsObserver, RetryPolicy
+from specd.sdk import response_cache
+
+from .fakes import AsyncFuture, AsyncResponse, Operation, Response
+
+ROWS = [{"id": index, "name": f"pet {index}"} for index in range(3)]
+
+# Cache-Control sent back for each limit query param
+CACHE_CONTROL = {1: "max-age=60", 2: "no-cache", 3: "no-store"}
+
+
+class CacheHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        limit = int(self.path.rsplit("limit=", 1)[-1])
+        etag = f'"v{limit}"'
+        self.requests.append((limit, self.headers.get("If-None-Match")))
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        content = json.dumps(ROWS[:limit]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("Cache-Control", CACHE_CONTROL[limit])
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    CacheHandler.requests = []
+    return CacheHandler
+
+
+def test_cache_max_age(specd_path, host):
+    sdk = create_sdk(specd_path, host=host, cache=True)
+    cache = sdk.swagger_spec.response_cache
+
+    assert sdk.pets.listPets(limit=1).result() == ROWS[:1]
+    assert sdk.pets.listPets(limit=1).result() == ROWS[:1]
+    (result, response) = sdk.pets.listPets(
+        limit=1, _request_options=dict(also_return_response=True)
+    ).result()
+    assert result == ROWS[:1]
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "max-age=60"
+    assert response.json() == json.loads(response.raw_bytes) == ROWS[:1]
+
+    assert CacheHandler.requests == [(1, None)]
+    assert cache.stats() == dict(
+        hits=2, misses=1, revalidated=0, hit_rate=2 / 3
+    )
+
+
+def test_cache_client_also_return_response(specd_path, host):
+    config = dict(also_return_response=True)
+    sdk = create_sdk(specd_path, host=host, config=config, cache=True)
+
+    for _ in range(2):
+        (result, response) = sdk.pets.listPets(limit=1).result()
+        assert (result, response.status_code) == (ROWS[:1], 200)
+    assert sdk.pets.listPets(
+        limit=1, _request_options=dict(also_return_response=False)
+    ).result() == ROWS[:1]
+    assert CacheHandler.requests == [(1, None)]
+
+
+def test_cache_revalidate(specd_path, host):
+    cache = ResponseCache()
+    sdk = create_sdk(specd_path, host=host, cache=cache)
+
+    assert sdk.pets.listPets(limit=2).result() == ROWS[:2]
+    (result, response) = sdk.pets.listPets(
+        limit=2, _request_options=dict(also_return_response=True)
+    ).result()
+    assert result == ROWS[:2]
+    assert response.status_code == 304
+
+    # a 304 makes the entry fresh again for the cache's ttl
+    assert sdk.pets.listPets(limit=2).result() == ROWS[:2]
+    assert CacheHandler.requests == [(2, None), (2, '"v2"')]
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_cache_no_store(specd_path, host):
+    cache = ResponseCache()
+    sdk = create_sdk(specd_path, host=host, cache=cache)
+
+    assert sdk.pets.listPets(limit=3).result() == ROWS
+    assert sdk.pets.listPets(limit=3).result() == ROWS
+    assert CacheHandler.requests == [(3, None), (3, None)]
+    assert cache.stats()["hit_rate"] == 0.0
+
+
+def test_cache_key_headers(specd_path, host):
+    cache = ResponseCache(headers=["Authorization"])
+    sdk = create_sdk(specd_path, host=host, cache=cache)
+
+    sdk.pets.listPets(limit=1).result()
+    sdk.set_headers(Authorization="Token A")
+    sdk.pets.listPets(limit=1).result()
+    sdk.pets.listPets(limit=1).result()
+    assert len(CacheHandler.requests) == 2
+
+
+def test_disk_backend(specd_path, host):
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(2):
+            cache = ResponseCache(backend=DiskBackend(directory))
+            sdk = create_sdk(specd_path, host=host, cache=cache)
+            assert sdk.pets.listPets(limit=1).result() == ROWS[:1]
+
+        assert len(os.listdir(directory)) == 1
+        assert CacheHandler.requests == [(1, None)]
+        assert DiskBackend(directory).get("missing") is None
+
+
+def test_disk_backend_models(specd_path, host):
+    with tempfile.TemporaryDirectory() as directory:
+        # an object Pet is unmarshalled into model instances
+        models_path = os.path.join(directory, "specs")
+        shutil.copytree(specd_path, models_path)
+        pet_path = os.path.join(models_path, "definitions", "Pet.yaml")
+        with open(pet_path, "a") as file_handle:
+            file_handle.write("type: object\n")
+
+        for _ in range(2):
+            cache = ResponseCache(backend=DiskBackend(directory))
+            sdk = create_sdk(models_path, host=host, cache=cache)
+            (result, response) = sdk.pets.listPets(
+                limit=1, _request_options=dict(also_return_response=True)
+            ).result()
+            assert type(result[0]).__name__ == "Pet"
+            assert (result[0].id, result[0].name) == (0, "pet 0")
+            assert response.status_code == 200
+
+        assert CacheHandler.requests == [(1, None)]
+
+
+def test_memory_backend_lru():
+    backend = MemoryBackend(maxsize=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    assert backend.get("a") == 1
+    backend.set("c", 3)
+    assert [backend.get(key) for key in "abc"] == [1, None, 3]
+
+
+def test_parse_cache_control():
+    value = 'private, Max-Age=30, no-cache="Set-Cookie"'
+    assert response_cache.parse_cache_control(value) == {
+        "private": None,
+        "max-age": "30",
+        "no-cache": "Set-Cookie",
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_cached_futures():
+    cache = ResponseCache()
+    response = AsyncResponse(headers={"ETag": '"v1"'}, text=json.dumps(ROWS))
+    not_modified = Response(304, "Not Modified")
+    calls = []
+
+    def call(_request_options, **op_kwargs):
+        calls.append(_request_options)
+        if "If-None-Match" in _request_options.get("headers", {}):
+            return AsyncFuture(error=async_exception.HTTPError(not_modified))
+        return AsyncFuture((ROWS, response))
+
+    def get_pets(**op_kwargs):
+        return response_cache.call_cached(
+            cache, call, Operation(), op_kwargs, is_async=True
+        )
+
+    options = dict(also_return_response=True)
+    page = await get_pets(limit=3, _request_options=options).result()
+    assert page == (ROWS, response)
+    assert await get_pets(limit=3).result() == ROWS
+    assert len(calls) == 1
+
+    # a 304 without a cached entry is left to the caller
+    options = dict(headers={"If-None-Match": '"v0"'})
+    with pytest.raises(async_exception.HTTPError):
+        await get_pets(limit=2, _request_options=options).result()
+
+    cache.ttl = 0
+    assert await get_pets(limit=4).result() == ROWS
+    assert await get_pets(limit=4).result() == ROWS
+    assert calls[-1]["headers"] == {"If-None-Match": '"v1"'}
+    assert cache.stats()["revalidated"] == 1
+
+
+class ResponseAdapter(AsyncioHTTPResponseAdapter):
+    """ Reads bodies without the loop argument that bravado_asyncio passes
+        to asyncio.wait_for, which newer Pythons no longer accept. """
+
+    @property
+    async def text(self):
+        return await self._delegate.text()
+
+    @property
+    async def raw_bytes(self):
+        return await self._delegate.read()
+
+    async def json(self, **_):
+        return await self._delegate.json()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cache", [None, ResponseCache()])
+async def test_async_client_cache(specd_path, host, monkeypatch, cache):
+    # aiobravado can't combine its timeout errors into one type here either
+    monkeypatch.setattr(AsyncioFutureAdapter, "timeout_errors", None)
+    observer = MetricsObserver()
+    sdk = create_sdk(
+        specd_path,
+        host=host,
+        async_enabled=True,
+        cache=cache,
+        observer=observer,
+        retry=RetryPolicy(retries=1),
+    )
+    sdk.swagger_spec.http_client.response_adapter = ResponseAdapter
+
+    async with sdk:
+        assert await sdk.pets.listPets(limit=1).result() == ROWS[:1]
+        (result, response) = await sdk.pets.listPets(
+            limit=1, _request_options=dict(also_return_response=True)
+        ).result()
+        assert (result, response.status_code) == (ROWS[:1], 200)
+        assert await sdk.pets.listPets(limit=3).result() == ROWS
+
+    limits = [limit for (limit, _) in CacheHandler.requests]
+    assert limits == ([1, 1, 3] if cache is None else [1, 3])
+    totals = observer.as_dict()["listPets"]
+    assert (totals["count"], totals["errors"]) == (len(limits), 0)
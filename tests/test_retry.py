@@ -0,0 +1,187 @@
+import asyncio
+import email.utils
+import http.server
+import json
+import time
+
+import aiohttp
+import pytest
+from aiobravado import exception as async_exception
+from bravado import exception
+
+from specd.sdk import create_sdk, RetryPolicy, CircuitBreaker
+from specd.sdk import CircuitOpenError, retry
+
+from .fakes import AsyncFuture, Operation, Response
+
+ROWS = [{"id": index, "name": f"pet {index}"} for index in range(3)]
+
+
+class FlakyHandler(http.server.BaseHTTPRequestHandler):
+    """ Unavailable for the first failures requests, then lists pets. """
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    retry_after = "0"
+    requests = []
+
+    def do_GET(self):
+        self.requests.append("GET")
+        limit = int(self.path.rsplit("limit=", 1)[-1])
+        if len(self.requests) <= self.failures:
+            self.send(503, [], {"Retry-After": self.retry_after})
+        else:
+            self.send(404 if limit == 404 else 200, ROWS[:limit])
+
+    def do_POST(self):
+        self.requests.append("POST")
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send(503 if len(self.requests) <= self.failures else 201, {})
+
+    def send(self, status, rows, headers=None):
+        content = json.dumps(rows).encode("utf-8")
+        self.send_response(status)
+        for (key, value) in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    FlakyHandler.failures = 0
+    FlakyHandler.retry_after = "0"
+    FlakyHandler.requests = []
+    return FlakyHandler
+
+
+def test_retry_until_available(specd_path, host):
+    FlakyHandler.failures = 2
+    sdk = create_sdk(specd_path, host=host, retry=True)
+    (result, response) = sdk.pets.listPets(
+        limit=2, _request_options=dict(also_return_response=True)
+    ).result()
+    assert (result, response.status_code) == (ROWS[:2], 200)
+    assert FlakyHandler.requests == ["GET"] * 3
+
+
+def test_retries_exhausted(specd_path, host):
+    FlakyHandler.failures = 5
+    sdk = create_sdk(specd_path, host=host, retry=RetryPolicy(retries=2))
+    with pytest.raises(exception.HTTPServiceUnavailable):
+        sdk.pets.listPets(limit=2).result()
+    assert FlakyHandler.requests == ["GET"] * 3
+
+
+def test_not_retried(specd_path, host):
+    sdk = create_sdk(specd_path, host=host, retry=True)
+    with pytest.raises(exception.HTTPNotFound):
+        sdk.pets.listPets(limit=404).result()
+
+    # POST is not idempotent, nor is a Retry-After past max_backoff waited
+    FlakyHandler.failures = 3
+    with pytest.raises(exception.HTTPServiceUnavailable):
+        sdk.pets.createPets().result()
+    FlakyHandler.retry_after = "60"
+    with pytest.raises(exception.HTTPServiceUnavailable):
+        sdk.pets.listPets(limit=2).result()
+    assert FlakyHandler.requests == ["GET", "POST", "GET"]
+
+
+def test_retry_observed_per_attempt(specd_path, host):
+    FlakyHandler.failures = 1
+    timings = []
+    observer = type("Observer", (), dict(observe=timings.append))()
+    sdk = create_sdk(specd_path, host=host, retry=True, observer=observer)
+    assert sdk.pets.listPets(limit=1).result() == ROWS[:1]
+    assert [timing.status_code for timing in timings] == [503, 200]
+
+
+def test_circuit_breaker(specd_path, socket_enabled):
+    breaker = CircuitBreaker(failures=2, reset_timeout=0.1)
+    policy = RetryPolicy(retries=1, backoff=0, breaker=breaker)
+    sdk = create_sdk(specd_path, host="127.0.0.1:1", retry=policy)
+
+    # both attempts fail to connect, which opens the circuit
+    with pytest.raises(Exception) as error:
+        sdk.pets.listPets(limit=1).result()
+    assert not isinstance(error.value, CircuitOpenError)
+    assert breaker.is_open("127.0.0.1:1")
+
+    with pytest.raises(CircuitOpenError) as error:
+        sdk.pets.listPets(limit=1)
+    assert error.value.host == "127.0.0.1:1"
+
+    # after reset_timeout one trial call goes through, and fails again
+    time.sleep(0.1)
+    future = sdk.pets.listPets(limit=1)
+    with pytest.raises(CircuitOpenError):
+        future.result()
+    with pytest.raises(CircuitOpenError):
+        sdk.pets.listPets(limit=1)
+
+
+def test_circuit_breaker_closes(specd_path, host):
+    breaker = CircuitBreaker(failures=1, reset_timeout=0)
+    policy = RetryPolicy(retries=0, breaker=breaker)
+    sdk = create_sdk(specd_path, host=host, retry=policy)
+
+    FlakyHandler.failures = 1
+    with pytest.raises(exception.HTTPServiceUnavailable):
+        sdk.pets.listPets(limit=1).result()
+    assert breaker.is_open(host)
+    assert sdk.pets.listPets(limit=1).result() == ROWS[:1]
+    assert not breaker.is_open(host)
+
+
+def test_is_idempotent():
+    policy = RetryPolicy()
+    assert policy.is_idempotent(Operation(http_method="put"))
+    assert not policy.is_idempotent(Operation(http_method="post"))
+    assert policy.is_idempotent(
+        Operation(http_method="post", op_spec={"x-idempotent": True})
+    )
+    assert not policy.is_idempotent(
+        Operation(op_spec={"x-idempotent": False})
+    )
+
+
+def test_delay():
+    policy = RetryPolicy(backoff=1, max_backoff=5)
+    assert all(0 <= policy.delay(1) <= 2 for _ in range(20))
+    assert all(0 <= policy.delay(10) <= 5 for _ in range(20))
+
+    later = email.utils.formatdate(time.time() + 3, usegmt=True)
+    response = type("Response", (), dict(headers={"Retry-After": later}))
+    assert 1 < policy.delay(0, response) <= 3
+    assert retry.parse_retry_after("soon") is None
+    assert retry.parse_retry_after(" 4 ") == 4.0
+
+
+@pytest.mark.asyncio
+async def test_retry_async():
+    errors = [aiohttp.ClientConnectionError(), asyncio.TimeoutError()]
+    calls = []
+
+    def call(**op_kwargs):
+        op_kwargs["_request_options"]["headers"]["X-Attempt"] = "1"
+        calls.append(op_kwargs)
+        return AsyncFuture(ROWS, errors.pop(0) if errors else None)
+
+    policy = RetryPolicy(backoff=0.01)
+    list_pets = retry.retry_call(policy, call, Operation(), is_async=True)
+    options = dict(headers={"Authorization": "Token A"})
+    assert await list_pets(_request_options=options).result() == ROWS
+    assert len(calls) == 3
+    # every attempt gets its own copy of the request options
+    assert options == dict(headers={"Authorization": "Token A"})
+
+    errors = [async_exception.HTTPError(Response(404, "Not Found"))]
+    with pytest.raises(async_exception.HTTPError):
+        await list_pets().result()
+    assert len(calls) == 4
@@ -1,13 +1,15 @@
+import asyncio
+import http.server
 import os
+import shutil
+import socket
+import tempfile
 
 import pytest
+from bravado.exception import BravadoTimeoutError
+from bravado_core import spec
 
-from specd.sdk import create_sdk
-
-
-@pytest.fixture()
-def specd_path():
-    return os.path.join(os.path.dirname(__file__), "specs")
+from specd.sdk import client_async, create, create_sdk, functions
 
 
 @pytest.fixture()
@@ -33,6 +35,25 @@ def test_set_headers(sdk):
     }
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("async_enabled", [False, True])
+async def test_resources_reused(specd_path, async_enabled):
+    sdk = create_sdk(specd_path, async_enabled=async_enabled)
+    (pets, list_pets) = (sdk.pets, sdk.pets.listPets)
+    assert sdk.pets is pets
+    assert sdk.pets.listPets is list_pets
+    assert sdk.pets.createPets is not list_pets
+
+    sdk.set_headers(Authorization="Token A")
+    assert sdk.pets is not pets
+    assert sdk.pets.listPets.headers == dict(Authorization="Token A")
+    # decorators resolved before set_headers share the same headers
+    assert list_pets.headers == dict(Authorization="Token A")
+
+    if async_enabled:
+        await sdk.close()
+
+
 def test_definitions(sdk):
     assert sdk.definitions.Pet == sdk.definitions["Pet"]
 
@@ -102,6 +123,9 @@ async def test_async_sdk(specd_path, socket_enabled):
     assert isinstance(pet, Pet)
     assert pet.speak() == "woof"
 
+    (pet,) = sdk.instantiate_many("Pet", [RESPONSE], validate=False)
+    assert pet.speak() == "woof"
+
     token = "Token 0123456789ABCDEF"
     sdk.set_headers(Authorization=token)
     assert sdk.pets.listPets.headers == dict(Authorization=token)
@@ -115,6 +139,286 @@ async def test_async_sdk(specd_path, socket_enabled):
     await sdk.close()
 
 
+def test_instantiate_many(sdk):
+    records = ({"id": index, "name": f"pet {index}"} for index in range(3))
+    pets = sdk.instantiate_many(sdk.definitions.Pet, records)
+    assert next(pets).id == 0
+    assert [pet.name for pet in pets] == ["pet 1", "pet 2"]
+
+    pet = sdk.instantiate("Pet", RESPONSE)
+    (fast,) = sdk.instantiate_many("Pet", [RESPONSE], validate=False)
+    assert type(fast) is type(pet)
+    assert fast == pet
+    assert fast._as_dict() == pet._as_dict()
+
+
+def test_instantiate_many_without_missing(specd_path):
+    sdk = create_sdk(specd_path, config=dict(include_missing_properties=False))
+    records = [{"id": 1}]
+    (pet,) = sdk.instantiate_many("Pet", records)
+    (fast,) = sdk.instantiate_many("Pet", records, validate=False)
+    assert list(fast) == list(pet) == ["id"]
+
+
+def test_model_types_built_once(sdk):
+    pet = sdk.instantiate(sdk.definitions.Pet, RESPONSE)
+    other = sdk.instantiate("Pet", RESPONSE)
+    assert type(pet) is type(other)
+    assert isinstance(other, sdk.get_model_type("Pet"))
+    assert sdk.definitions.Pet.value == type(pet)._model_spec
+
+
+def test_model_types_lru(specd_path):
+    sdk = create_sdk(specd_path, model_cache_size=2)
+    model_types = functions.get_model_types(sdk.swagger_spec)
+    assert len(model_types) == 0
+
+    pet_type = sdk.get_model_type("Pet")
+    sdk.get_model_type("Error")
+    sdk.get_model_type("Pet")
+    sdk.get_model_type("Pets")
+    assert "Pet" in model_types
+    assert "Error" not in model_types
+    assert len(model_types) == 2
+    assert sdk.get_model_type("Pet") is pet_type
+
+
+class OkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def handler():
+    return OkHandler
+
+
+@pytest.fixture()
+def server(host):
+    return "http://%s" % host
+
+
+def test_sync_connection_pool(specd_path, server):
+    sdk = create_sdk(
+        specd_path,
+        limit_per_host=3,
+        http_options=dict(retries=2, backoff_factor=0.5),
+    )
+    session = sdk.swagger_spec.http_client.session
+    adapter = session.get_adapter(server)
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.backoff_factor == 0.5
+
+    assert session.get(server).text == "ok"
+    assert session.get(server).text == "ok"
+    assert sdk.pool_stats() == {
+        server: dict(connections=1, requests=2, idle=1, maxsize=3)
+    }
+
+    pool_kw = adapter.poolmanager.connection_pool_kw
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in pool_kw[
+        "socket_options"
+    ]
+
+
+def test_sync_read_timeout(specd_path, socket_enabled):
+    # a server that accepts connections but never responds
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    host = "127.0.0.1:%s" % listener.getsockname()[1]
+
+    sdk = create_sdk(specd_path, host=host)
+    future = sdk.pets.listPets(_request_options=dict(timeout=0.1))
+    with pytest.raises(BravadoTimeoutError):
+        future.result()
+    listener.close()
+
+
+def test_sync_connection_pool_without_keepalive(specd_path):
+    sdk = create_sdk(specd_path, http_options=dict(keepalive=False))
+    adapter = sdk.swagger_spec.http_client.session.get_adapter("https://x")
+    assert "socket_options" not in adapter.poolmanager.connection_pool_kw
+    assert sdk.pool_stats() == {}
+
+
+class PetOperation(object):
+    """ Stands in for a CallableOperation, tracking calls in flight. """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = []
+
+    def __call__(self, petId):
+        return PetFuture(self, petId)
+
+
+class PetFuture(object):
+    def __init__(self, operation, pet_id):
+        self.operation = operation
+        self.pet_id = pet_id
+
+    async def result(self):
+        self.operation.in_flight += 1
+        self.operation.max_in_flight = max(
+            self.operation.max_in_flight, self.operation.in_flight
+        )
+        await asyncio.sleep(0.2 if self.pet_id == "0" else 0.01)
+        self.operation.in_flight -= 1
+        self.operation.completed.append(self.pet_id)
+
+        if self.pet_id == "bad":
+            raise ValueError(self.pet_id)
+        return {"id": int(self.pet_id)}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ordered", [True, False])
+async def test_async_map(specd_path, ordered):
+    sdk = create_sdk(specd_path, async_enabled=True)
+    operation = PetOperation()
+    pet_ids = ["0", "1", "bad", "3", "4"]
+    kwargs_iterable = (dict(petId=pet_id) for pet_id in pet_ids)
+
+    results = []
+    calls = sdk.map(operation, kwargs_iterable, concurrency=2, ordered=ordered)
+    async for call_result in calls:
+        results.append(call_result)
+    await sdk.close()
+
+    indexes = [call_result.index for call_result in results]
+    assert indexes == ([0, 1, 2, 3, 4] if ordered else [1, 2, 3, 4, 0])
+    assert operation.max_in_flight == 2
+
+    results.sort()
+    assert [r.kwargs["petId"] for r in results] == pet_ids
+    assert results[2].result is None
+    assert isinstance(results[2].error, ValueError)
+    assert [r.result["id"] for r in results if r.error is None] == [0, 1, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_async_map_unlimited_connector(specd_path):
+    sdk = create_sdk(
+        specd_path,
+        async_enabled=True,
+        limit_per_host=0,
+        http_options=dict(limit=0),
+    )
+    operation = PetOperation()
+    kwargs_iterable = [dict(petId=str(pet_id)) for pet_id in range(12)]
+
+    results = [r async for r in sdk.map(operation, kwargs_iterable)]
+    assert [r.result["id"] for r in results] == list(range(12))
+    assert operation.max_in_flight == client_async.MAP_CONCURRENCY
+
+    with pytest.raises(ValueError):
+        await sdk.map(operation, kwargs_iterable, concurrency=-1).__anext__()
+    await sdk.close()
+
+
+@pytest.mark.asyncio
+async def test_async_map_closed_early(specd_path):
+    sdk = create_sdk(specd_path, async_enabled=True)
+    operation = PetOperation()
+    kwargs_iterable = [dict(petId=pet_id) for pet_id in ["0", "1", "2"]]
+
+    calls = sdk.map(operation, kwargs_iterable, concurrency=2, ordered=False)
+    first = await calls.__anext__()
+    await calls.aclose()
+    await asyncio.sleep(0.3)
+    await sdk.close()
+
+    # the slow call in flight was cancelled and no further call was made
+    assert first.index == 1
+    assert operation.completed == ["1"]
+
+
+@pytest.mark.asyncio
+async def test_async_map_limit_per_host(specd_path):
+    sdk = create_sdk(specd_path, async_enabled=True, limit_per_host=3)
+    operation = PetOperation()
+    kwargs_iterable = [dict(petId=str(pet_id)) for pet_id in range(10)]
+
+    results = [r async for r in sdk.map(operation, kwargs_iterable)]
+    await sdk.close()
+
+    assert [r.result["id"] for r in results] == list(range(10))
+    assert operation.max_in_flight == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("verify_ssl", [True, False])
+async def test_async_connector(specd_path, verify_ssl):
+    http_options = dict(limit=20, keepalive_timeout=5.0, ttl_dns_cache=60)
+    sdk = create_sdk(
+        specd_path,
+        async_enabled=True,
+        verify_ssl=verify_ssl,
+        limit_per_host=4,
+        http_options=http_options,
+    )
+
+    async with sdk as client_:
+        assert client_ is sdk
+        session = sdk.swagger_spec.http_client.client_session
+        connector = session.connector
+        assert (connector.limit, connector.limit_per_host) == (20, 4)
+        assert connector._keepalive_timeout == 5.0
+        assert connector._ssl is verify_ssl
+
+    assert session.closed
+    assert connector.closed
+
+
+def test_validated_spec_cache(specd_path, monkeypatch):
+    validate_spec = spec.validator20.validate_spec
+    calls = []
+
+    def count_validate(*args, **kwargs):
+        calls.append(args)
+        return validate_spec(*args, **kwargs)
+
+    monkeypatch.setattr(spec.validator20, "validate_spec", count_validate)
+    monkeypatch.setattr(create, "validated_hashes", set())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = os.path.join(tmp_dir, "specs")
+        shutil.copytree(specd_path, root)
+
+        assert create_sdk(root, use_cache=True).pets.listPets
+        assert create_sdk(root, use_cache=True).pets.listPets
+        assert len(calls) == 1
+
+        # a new process only has the hashes recorded on disk
+        create.validated_hashes.clear()
+        assert create_sdk(root, use_cache=True).pets.listPets
+        assert len(calls) == 1
+
+        # other targets and hosts assemble a different spec
+        create_sdk(root, targets=["gets"], host="example.com")
+        assert len(calls) == 2
+
+        # hashes written by other processes are kept, up to the newest 100
+        validated_file = create.get_validated_file(root)
+        (spec_hash,) = create.read_validated(validated_file)
+        others = [f"other{index}" for index in range(150)]
+        with open(validated_file, "w") as file_handle:
+            file_handle.write("\n".join([spec_hash] + others))
+        create.set_validated(spec_hash, validated_file)
+        hashes = create.read_validated(validated_file)
+        assert hashes == others[-99:] + [spec_hash]
+
+
 RESPONSE = {
     "id": 898988944,
     "category": {"id": 0, "name": "string"},
@@ -0,0 +1,67 @@
+import io
+import os
+import tempfile
+
+import pytest
+
+from specd import tasks, SpecDir
+from specd.stream import write_spec
+from specd.utils import dict_to_str
+
+
+@pytest.fixture()
+def long_text(output_specd):
+    """ Long text is wrapped at the same columns as a full dump. """
+    spec_dir = SpecDir(output_specd)
+    operation = spec_dir.get_path("/pet").get_operation("post")
+    operation.write(dict(operation.read(), description="word " * 40))
+    return output_specd
+
+
+@pytest.mark.parametrize("format", ["json", "yaml"])
+@pytest.mark.parametrize("targets", [[], ["x"]])
+@pytest.mark.parametrize("use_cache", [False, True])
+@pytest.mark.usefixtures("long_text")
+def test_write_spec_matches_as_str(output_specd, format, targets, use_cache):
+    spec_dir = SpecDir(output_specd, use_cache=use_cache)
+    file_handle = io.StringIO()
+    write_spec(spec_dir, file_handle, format, targets)
+
+    expected = SpecDir(output_specd).as_str(format, targets)
+    assert file_handle.getvalue() == expected
+
+
+@pytest.mark.parametrize("format", ["json", "yaml"])
+def test_write_spec_meta_only(format):
+    with tempfile.TemporaryDirectory() as input_dir:
+        spec_dir = tasks.create_specd(input_dir)
+        spec_dir.meta.write({"paths": {}})
+
+        file_handle = io.StringIO()
+        write_spec(spec_dir, file_handle, format)
+        assert file_handle.getvalue() == dict_to_str(spec_dir.as_dict(), format)
+
+
+@pytest.mark.parametrize("format", ["json", "yaml"])
+def test_write_spec_parses_once(output_specd, format):
+    spec_dir = SpecDir(output_specd)
+    loaded = []
+    load_file = spec_dir.load_file
+
+    def counting_load_file(file_path):
+        loaded.append(file_path)
+        return load_file(file_path)
+
+    spec_dir.load_file = counting_load_file
+    write_spec(spec_dir, io.StringIO(), format)
+    assert len(loaded) == len(set(loaded)) == 1 + 20 + 6
+
+
+@pytest.mark.usefixtures("long_text")
+def test_convert_specd_to_file_yaml(output_specd):
+    output_file = os.path.join(output_specd, "out.yaml")
+    tasks.convert_specd_to_file(output_specd, output_file, workers=2)
+
+    expected = dict_to_str(SpecDir(output_specd).as_dict(), "yaml")
+    assert open(output_file).read() == expected
+    assert not [fn for fn in os.listdir(output_specd) if fn.endswith(".tmp")]
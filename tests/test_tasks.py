@@ -1,5 +1,8 @@
+import json
 import os
+import shutil
 import tempfile
+import pytest
 from specd import tasks, utils, SpecDir
 from stringcase import snakecase
 
@@ -122,8 +125,103 @@ def test_convert_specd_to_file():
         assert spec == SpecDir(output_specd).as_dict()
 
         # now run again and thus trigger merge logic
-        tasks.convert_file_to_specd(input_file, output_specd, "yaml", "camel")
+        summary = tasks.convert_file_to_specd(
+            input_file, output_specd, "yaml", "camel"
+        )
         assert spec == SpecDir(output_specd).as_dict()
+        assert (summary.created, summary.merged) == ([], [])
+        assert len(summary.unchanged) == 20 + 6
+        assert summary.skipped == ["specd.yaml"]
+
+
+def test_convert_file_to_specd_parallel():
+    input_file = os.path.join(os.path.dirname(__file__), "petstore.json")
+    with tempfile.TemporaryDirectory() as root:
+        one = os.path.join(root, "one")
+        two = os.path.join(root, "two")
+        tasks.convert_file_to_specd(input_file, one, "yaml", "camel")
+        summary = tasks.convert_file_to_specd(
+            input_file, two, "yaml", "camel", workers=2
+        )
+        assert len(summary.created) == 20 + 6 + 1
+        assert "paths/pet/{petId}/get.yaml" in summary.created
+        assert summary[1:] == ([], [], [])
+        assert SpecDir(two).as_dict() == SpecDir(one).as_dict()
+
+        # merged files keep what the new spec does not have, and files
+        # already holding the merged spec are not written again
+        tag = SpecDir(two).get_definition("Tag")
+        tag.write(dict(tag.read(), description="A tag."))
+        category = SpecDir(two).get_definition("Category")
+        category.write(dict(category.read(), type="string"))
+        summary = tasks.convert_file_to_specd(
+            input_file, two, "yaml", "camel", 2
+        )
+        assert summary.merged == ["definitions/Category.yaml"]
+        assert "definitions/Tag.yaml" in summary.unchanged
+        assert tag.read()["description"] == "A tag."
+        assert category.read()["type"] == "object"
+        assert not [fn for fn in os.listdir(root) if fn.endswith(".tmp")]
+
+
+def test_convert_file_to_specd_same_file():
+    input_file = os.path.join(os.path.dirname(__file__), "petstore.json")
+    spec = utils.file_path_to_dict(input_file)
+    # /pet/ lands on the same operation files as /pet
+    spec["paths"]["/pet/"] = dict(put=dict(operationId="updatePet", x=1))
+
+    with tempfile.TemporaryDirectory() as root:
+        input_file = os.path.join(root, "petstore.json")
+        with open(input_file, "w") as file_handle:
+            json.dump(spec, file_handle)
+
+        output_specd = os.path.join(root, "specd")
+        summary = tasks.convert_file_to_specd(
+            input_file, output_specd, "yaml", "camel", workers=2
+        )
+        assert len(summary.created) == 20 + 6 + 1
+        assert len(set(summary.created)) == len(summary.created)
+
+        operation = SpecDir(output_specd).get_path("/pet").get_operation("put")
+        op_spec = operation.read()
+        assert op_spec["x"] == 1
+        assert op_spec["summary"] == spec["paths"]["/pet"]["put"]["summary"]
+
+
+def test_convert_specd_to_files():
+    input_dir = os.path.join(os.path.dirname(__file__), "specs")
+    spec_dir = SpecDir(input_dir)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        fps = tasks.convert_specd_to_files(input_dir, output_dir)
+        assert sorted(os.listdir(output_dir)) == [
+            "gets.json",
+            "posts.json",
+            "published.json",
+        ]
+        for fp in fps:
+            target = os.path.basename(fp)[: -len(".json")]  # noqa E203
+            spec = utils.file_path_to_dict(fp)
+            assert spec == spec_dir.as_dict(targets=[target])
+
+
+def test_convert_specd_to_files_selected_targets():
+    input_dir = os.path.join(os.path.dirname(__file__), "specs")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        spec_root = os.path.join(tmp_dir, "specs")
+        shutil.copytree(input_dir, spec_root)
+        output_dir = os.path.join(tmp_dir, "out")
+
+        fps = tasks.convert_specd_to_files(
+            spec_root, output_dir, ["posts", "x"], "yaml", use_cache=True
+        )
+        assert fps == [os.path.join(output_dir, "posts.yaml")]
+        assert os.path.exists(os.path.join(spec_root, ".specd-cache"))
+
+        spec = utils.file_path_to_dict(fps[0])
+        assert spec == SpecDir(spec_root).as_dict(targets=["posts"])
+        assert list(spec["paths"]) == ["/pets"]
 
 
 def test_check_for_not_a_specd():
@@ -143,6 +241,16 @@ def test_check_diff():
         assert diffs.keys() == {("definitions", "Pet")}
 
 
+def test_fingerprint_specd():
+    with tempfile.TemporaryDirectory() as output_specd:
+        input_file = os.path.join(os.path.dirname(__file__), "petstore.json")
+        tasks.convert_file_to_specd(input_file, output_specd, "yaml", "camel")
+
+        fingerprint = tasks.fingerprint_specd(output_specd, use_cache=True)
+        assert fingerprint == SpecDir(output_specd).fingerprint()
+        assert set(fingerprint.nodes["definitions"]) <= set("0123456789abcdef")
+
+
 def test_list_specd():
     with tempfile.TemporaryDirectory() as output_specd:
         input_file = os.path.join(os.path.dirname(__file__), "petstore.json")
@@ -254,3 +362,40 @@ def test_new_spec():
             for operation in path.operations():
                 assert operation.method in path_spec
                 assert operation.read() == path_spec.get(operation.method)
+
+
+@pytest.mark.parametrize("use_cache,workers", [(False, None), (True, 2)])
+def test_compare_specifications(use_cache, workers):
+    with tempfile.TemporaryDirectory() as root:
+        f = os.path.join(os.path.dirname(__file__), "petstore.json")
+        one = os.path.join(root, "one")
+        two = os.path.join(root, "two")
+        tasks.convert_file_to_specd(f, one, "yaml", "camel")
+        tasks.convert_file_to_specd(f, two, "json", "camel")
+
+        result = tasks.compare_specifications(one, f, use_cache, workers)
+        assert result == ([], [], {})
+
+        spec_dir = SpecDir(two)
+        for name in ("Pet", "Tag"):
+            definition = spec_dir.get_definition(name)
+            definition.write(dict(definition.read(), description=name))
+        os.remove(spec_dir.get_definition("User").file_path)
+        spec_dir.get_definition("Owner").write({"type": "object"})
+        operation = spec_dir.get_path("/store/inventory").get_operation("get")
+        operation.write(dict(operation.read(), targets=["published"]))
+
+        result = tasks.compare_specifications(one, two, use_cache, workers)
+        assert result.added == [("definitions", "Owner")]
+        assert result.removed == [("definitions", "User")]
+        assert result.changed == {
+            ("definitions", "Pet"): [("add", "", [("description", "Pet")])],
+            ("definitions", "Tag"): [("add", "", [("description", "Tag")])],
+        }
+
+        # YAML keys can mix types, like the 200 and default responses
+        operation = SpecDir(one).get_path("/pet").get_operation("post")
+        responses = {200: {"description": "ok"}, "default": {"description": ""}}
+        operation.write(dict(operation.read(), responses=responses))
+        result = tasks.compare_specifications(one, f, use_cache, workers)
+        assert list(result.changed) == [("paths", "/pet", "post")]
@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+import pytest
+import yaml
+
+from specd import utils
+
+
+def test_yaml_loader_and_dumper_match_pure_python():
+    input_file = os.path.join(os.path.dirname(__file__), "petstore.yaml")
+    content_str = open(input_file).read()
+
+    spec = utils.load_yaml(content_str)
+    assert spec == utils.load_yaml(content_str, loader=yaml.SafeLoader)
+    assert spec == yaml.load(content_str, Loader=yaml.FullLoader)
+
+    spec_str = utils.dict_to_str(spec, "yaml")
+    assert spec_str == yaml.dump(spec, default_flow_style=False)
+
+
+def test_yaml_dump_long_strings():
+    # libyaml folds long quoted scalars with a space before \n differently
+    words = " ".join(f"word{index}" for index in range(40))
+    spec = {
+        "description": f"{words} \n{words} \n  indented {words}",
+        "summary": f"{words}\n\n{words}",
+        "example": f"'{words}' \\ \t{words}",
+    }
+    spec_str = utils.dict_to_str(spec, "yaml")
+    assert spec_str == yaml.dump(spec, default_flow_style=False)
+    assert utils.load_yaml(spec_str) == spec
+
+
+def test_write_atomic():
+    with tempfile.TemporaryDirectory() as output_dir:
+        file_path = os.path.join(output_dir, "out.json")
+        utils.write_atomic(file_path, "{}")
+        utils.write_atomic(file_path + ".bin", b"{}")
+        assert utils.file_path_to_dict(file_path) == {}
+
+        with pytest.raises(TypeError):
+            utils.write_atomic(file_path, None)
+
+        assert open(file_path).read() == "{}"
+        assert sorted(os.listdir(output_dir)) == ["out.json", "out.json.bin"]
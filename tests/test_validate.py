@@ -2,6 +2,10 @@ from swagger_spec_validator import validator20, SwaggerValidationError
 import os
 import json
 
+import pytest
+
+from specd import tasks, validation, SpecDir
+
 
 def test_validation():
     file_path = os.path.join(os.path.dirname(__file__), "petstore.json")
@@ -17,3 +21,178 @@ def test_failed_validation():
         assert isinstance(e, SwaggerValidationError)
         message = e.args[0].split("\n")[0]
         assert message == "'info' is a required property"
+
+
+def validate(spec_dir, **kwargs):
+    return validation.IncrementalValidator(spec_dir).validate(**kwargs)
+
+
+def test_incremental_validation(monkeypatch, output_specd):
+    validated = []
+    validate_spec = validator20.validate_spec
+
+    def recording_validate_spec(spec):
+        validated.append(spec)
+        return validate_spec(spec)
+
+    monkeypatch.setattr(
+        validation.validator20, "validate_spec", recording_validate_spec
+    )
+
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    checked = validate(spec_dir)
+    assert checked == dict(full=True, operations=20, definitions=6)
+
+    # nothing changed, nothing validated
+    checked = validate(spec_dir)
+    assert checked == dict(full=False, operations=0, definitions=0)
+    assert len(validated) == 1
+
+    # Tag is referenced by Pet, which 5 operations reference
+    tag = spec_dir.get_definition("Tag")
+    tag.write(dict(tag.read(), description="A tag."))
+    checked = validate(spec_dir)
+    assert checked == dict(full=False, operations=5, definitions=3)
+    definitions = sorted(validated[-1]["definitions"])
+    assert definitions == ["Category", "Pet", "Tag"]
+    assert validated[-1]["info"]["title"] == "Swagger Petstore"
+
+    operation = spec_dir.get_path("/user/logout").get_operation("get")
+    operation.write(dict(operation.read(), summary="Logs out."))
+    checked = validate(spec_dir)
+    assert checked == dict(full=False, operations=1, definitions=0)
+
+    checked = validate(spec_dir, full=True)
+    assert checked == dict(full=True, operations=20, definitions=6)
+
+
+def test_incremental_validation_errors(output_specd):
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    validate(spec_dir)
+
+    operation = spec_dir.get_path("/user/logout").get_operation("get")
+    original = operation.read()
+    operation.write(dict(original, operationId="loginUser"))
+    message = tasks.validate_specd(output_specd, incremental=True)
+    assert message == "Duplicate operationId: loginUser"
+
+    # a failed run keeps the last passing state, so the change is seen
+    operation.write(dict(original, responses=None))
+    message = tasks.validate_specd(output_specd, incremental=True)
+    assert message == "None is not of type 'object'"
+
+    operation.write(original)
+    assert tasks.validate_specd(output_specd, incremental=True) is None
+
+    # removing a definition re-checks the operations that $ref it
+    definition = spec_dir.get_definition("ApiResponse")
+    def_spec = definition.read()
+    os.remove(definition.file_path)
+    message = tasks.validate_specd(output_specd, incremental=True)
+    assert "ApiResponse" in message
+
+    # a new meta file validates everything
+    definition.write(def_spec)
+    spec_dir.meta.write(dict(spec_dir.meta.read(), host="example.org"))
+    checked = validate(spec_dir)
+    assert checked == dict(full=True, operations=20, definitions=6)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_check_specd(workers, output_specd):
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    assert tasks.check_specd(output_specd, workers=workers) == []
+
+    # Pet is used by 5 operations, its error is only reported once
+    tag = spec_dir.get_definition("Tag")
+    tag.write(dict(tag.read(), properties=[]))
+    pet = spec_dir.get_path("/pet").get_operation("post")
+    pet.write(dict(pet.read(), responses=None))
+    user = spec_dir.get_path("/user/{username}").get_operation("get")
+    user.write(dict(user.read(), parameters=[]))
+
+    errors = tasks.check_specd(output_specd, workers=workers)
+    assert errors == [
+        validation.FileError(
+            "definitions/Tag.yaml",
+            "/properties",
+            "[] is not of type 'object'",
+        ),
+        validation.FileError(
+            "paths/pet/post.yaml",
+            "/responses",
+            "None is not of type 'object'",
+        ),
+        validation.FileError(
+            "paths/user/{username}/get.yaml",
+            "",
+            "Path parameter 'username' used is not documented on "
+            "'/user/{username}'",
+        ),
+    ]
+
+
+def test_check_specd_meta(output_specd):
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    meta = spec_dir.meta.read()
+    spec_dir.meta.write(dict(meta, info=dict(title="Petstore")))
+    (error,) = set(tasks.check_specd(output_specd))
+    assert error == validation.FileError(
+        "specd.yaml", "/info", "'version' is a required property"
+    )
+
+    missing = os.path.join(output_specd, "missing")
+    message = f"Not in a valid specd root directory: {missing}"
+    assert tasks.check_specd(missing) == [
+        validation.FileError(missing, "", message)
+    ]
+
+
+def test_to_pointer():
+    assert validation.to_pointer([]) == ""
+    assert validation.to_pointer(["paths", "/a/b", 0, "x~y"]) == (
+        "/paths/~1a~1b/0/x~0y"
+    )
+
+
+def test_check_spec_default_value():
+    spec = dict(
+        swagger="2.0",
+        info=dict(title="Petstore", version="1.0"),
+        paths={},
+        definitions=dict(
+            Pet=dict(properties=dict(id=dict(type="integer", default="x")))
+        ),
+    )
+    # the error's path is into the default value, not the spec
+    assert validation.check_spec(spec) == (
+        [],
+        "'x' is not of type 'integer'",
+    )
+
+    tag = dict(
+        type="object",
+        properties=dict(id=dict(type="integer")),
+        default=dict(id="x"),
+    )
+    spec["definitions"] = dict(Pet=dict(properties=dict(tag=tag)))
+    assert validation.check_spec(spec)[0] == []
+
+
+def test_check_specd_discriminator(output_specd):
+    spec_dir = SpecDir(output_specd, use_cache=True)
+    spec_dir.get_definition("Animal").write(
+        dict(
+            type="object",
+            required=["kind"],
+            properties=dict(kind=dict(type="string")),
+        )
+    )
+    # passes only once checked against the real Animal definition
+    spec_dir.get_definition("Dog").write(
+        dict(
+            discriminator="kind",
+            allOf=[{"$ref": "#/definitions/Animal"}],
+        )
+    )
+    assert tasks.check_specd(output_specd) == []
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+
+import pytest
+
+from specd import tasks, SpecDir
+from specd.utils import file_path_to_dict
+from specd.watch import LiveSpec, Watcher
+
+
+def test_watcher_poll(output_specd):
+    spec_dir = SpecDir(output_specd)
+    watcher = Watcher(spec_dir)
+    notified = []
+    watcher.subscribe(notified.append)
+    assert watcher.poll() == set()
+
+    definition = spec_dir.get_definition("Tag")
+    definition.write(dict(definition.read(), description="changed"))
+    spec_dir.get_definition("NewTag").write({"type": "object"})
+    os.remove(spec_dir.get_definition("Category").file_path)
+
+    changed = {
+        "definitions/Tag.yaml",
+        "definitions/NewTag.yaml",
+        "definitions/Category.yaml",
+    }
+    assert watcher.poll() == changed
+    assert notified == [changed]
+    assert watcher.poll() == set()
+
+
+def test_watcher_thread(output_specd):
+    spec_dir = SpecDir(output_specd)
+    watcher = Watcher(spec_dir, interval=0.01)
+    event = threading.Event()
+    watcher.subscribe(lambda changed: event.set())
+
+    assert watcher.start() is watcher.start()
+    spec_dir.get_definition("NewTag").write({"type": "object"})
+    assert event.wait(5)
+
+    watcher.stop()
+    assert watcher.thread is None
+
+
+def test_live_spec_update(output_specd):
+    spec_dir = SpecDir(output_specd)
+    live_spec = LiveSpec(spec_dir)
+    assert live_spec.as_dict() == spec_dir.as_dict()
+
+    # change an operation, add a definition it references
+    operation = spec_dir.get_path("/store/inventory").get_operation("get")
+    op_spec = operation.read()
+    op_spec["responses"]["200"]["schema"] = {"$ref": "#/definitions/Inv"}
+    operation.write(op_spec)
+    spec_dir.get_definition("Inv").write({"type": "object"})
+
+    # remove an operation and a non-operation file
+    logout = spec_dir.get_path("/user/logout").get_operation("get")
+    os.remove(logout.file_path)
+    open(spec_dir.abspath("paths", "user", "notes.txt"), "w").close()
+
+    meta = spec_dir.meta.read()
+    spec_dir.meta.write(dict(meta, host="example.com"))
+
+    live_spec.update(
+        {
+            "specd.yaml",
+            "paths/store/inventory/get.yaml",
+            "paths/user/logout/get.yaml",
+            "paths/user/notes.txt",
+            "definitions/Inv.yaml",
+            ".specd-cache/files.pickle",
+        }
+    )
+    assert live_spec.as_dict() == spec_dir.as_dict()
+    assert live_spec.as_dict()["definitions"]["Inv"] == {"type": "object"}
+
+    # targets filter operations, dangling $ref is an error
+    live_spec = LiveSpec(spec_dir, targets=["x"])
+    assert live_spec.as_dict()["paths"] == {}
+    os.remove(spec_dir.get_definition("Inv").file_path)
+    live_spec.targets = set()
+    live_spec.update({"definitions/Inv.yaml"})
+    with pytest.raises(RuntimeError):
+        live_spec.as_dict()
+
+
+@pytest.mark.parametrize("debounce,interval", [(0, 0.1), (0.5, 0.5), (5, 1)])
+def test_watch_specd_to_file_interval(
+    monkeypatch, output_specd, debounce, interval
+):
+    intervals = []
+
+    class StoppedWatcher(Watcher):
+        def changes(self, debounce):
+            intervals.append(self.interval)
+            return iter(())
+
+    monkeypatch.setattr(tasks, "Watcher", StoppedWatcher)
+    output_file = os.path.join(output_specd, "out.json")
+    tasks.watch_specd_to_file(output_specd, output_file, debounce=debounce)
+    assert intervals == [interval]
+
+
+def test_watch_specd_to_file(capsys, output_specd):
+    spec_dir = SpecDir(output_specd)
+    output_file = os.path.join(output_specd, "out.json")
+    watcher = Watcher(spec_dir, interval=0.01)
+    output = []
+
+    def echoed():
+        output.append(capsys.readouterr().out)
+        return "".join(output)
+
+    thread = threading.Thread(
+        target=tasks.watch_specd_to_file,
+        args=(output_specd, output_file),
+        kwargs=dict(debounce=0.05, watcher=watcher),
+    )
+    thread.start()
+
+    try:
+        wait_for(lambda: os.path.exists(output_file))
+        assert file_path_to_dict(output_file) == spec_dir.as_dict()
+
+        definition = spec_dir.get_definition("Tag")
+        definition.write(dict(definition.read(), description="changed"))
+        wait_for(
+            lambda: file_path_to_dict(output_file)["definitions"]["Tag"]
+            == definition.read()
+        )
+
+        # same bytes as generate writes
+        expected_file = os.path.join(output_specd, "expected.json")
+        tasks.convert_specd_to_file(output_specd, expected_file)
+        with open(expected_file) as expected, open(output_file) as out:
+            assert out.read() == expected.read()
+
+        # mid-edit errors keep the last output, and watching goes on
+        with open(definition.file_path, "w") as file_handle:
+            file_handle.write("properties: [\n")
+        wait_for(lambda: "Not updating" in echoed())
+        assert file_path_to_dict(output_file)["definitions"]["Tag"]
+
+        operation = spec_dir.get_path("/store/inventory").get_operation(
+            "get"
+        )
+        op_spec = operation.read()
+        op_spec["responses"]["200"]["schema"] = {"$ref": "#/definitions/I"}
+        operation.write(op_spec)
+        definition.write({"type": "object"})
+        wait_for(lambda: "Failed to load definition: I" in echoed())
+
+        spec_dir.get_definition("I").write({"type": "object"})
+        wait_for(
+            lambda: file_path_to_dict(output_file)["definitions"].get("I")
+            == {"type": "object"}
+        )
+        assert file_path_to_dict(output_file) == spec_dir.as_dict()
+    finally:
+        watcher.stop()
+        thread.join()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)